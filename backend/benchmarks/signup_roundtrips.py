@@ -0,0 +1,42 @@
+"""
+Round trips and latency per signup, against the database configured in .env.
+
+    python benchmarks/signup_roundtrips.py [signups]
+
+Password hashing dominates the wall time; the statement count is the number to watch. Users created
+here are named bench_<run>_<n> and left in place.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+import statistics
+import sys
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from database import Base, engine
+from main import app
+from tests.base import count_queries
+
+def main(signups: int):
+    Base.metadata.create_all(engine)
+    run = uuid.uuid4().hex[:8]
+    latencies, statements_per_signup = [], []
+    with TestClient(app) as client:
+        for n in range(signups):
+            username = f"bench_{run}_{n}"
+            with count_queries() as statements:
+                started = time.perf_counter()
+                response = client.post("/signup", json={"email": f"{username}@example.com", "full_name": "Bench", "username": username, "password": "benchmark"})
+                latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.text
+            statements_per_signup.append(len(statements))
+    print(f"signups:                {signups}")
+    print(f"statements per signup:  {statistics.mean(statements_per_signup):.1f} (BEGIN and COMMIT not counted)")
+    print(f"latency p50 / max (ms): {statistics.median(latencies):.1f} / {max(latencies):.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -3,8 +3,8 @@ from pathlib import Path
 from fastapi_mail import ConnectionConfig
 from pydantic import SecretStr
 
-def get_env(name: str) -> str:
-    value = os.getenv(name)
+def get_env(name: str, default: str | None = None) -> str:
+    value = os.getenv(name, default)
     if value is None:
         raise RuntimeError(f"Environment variable '{name}' is required but not set.")
     return value
@@ -12,12 +12,58 @@ def get_env(name: str) -> str:
 IS_DOCKER = os.getenv("IS_DOCKER", False)
 JWT_SECRET_KEY = get_env("JWT_SECRET_KEY")
 GOOGLE_CLIENT_ID = get_env("VITE_GOOGLE_CLIENT_ID")
+GOOGLE_CERTS_URL = get_env("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
 VITE_GITHUB_CLIENT_ID = get_env("VITE_GITHUB_CLIENT_ID")
 GITHUB_CLIENT_SECRET = get_env("GITHUB_CLIENT_SECRET")
 POSTGRES_USER = get_env("POSTGRES_USER")
 POSTGRES_PASSWORD = get_env("POSTGRES_PASSWORD")
 PASSWORD_RESET_BASE_URL = get_env("PASSWORD_RESET_BASE_URL")
 
+# Database connection pool (per worker process)
+DB_POOL_SIZE = int(get_env("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(get_env("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(get_env("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(get_env("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+DB_POOL_PRE_PING = get_env("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Password hashing: changing the cost rehashes each user's password on their next login
+BCRYPT_ROUNDS = int(get_env("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(get_env("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# In-process caches of authenticated users and org memberships (seconds / entries)
+USER_CACHE_TTL = float(get_env("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(get_env("USER_CACHE_SIZE", "10000"))
+MEMBERSHIP_CACHE_TTL = float(get_env("MEMBERSHIP_CACHE_TTL", "30"))
+MEMBERSHIP_CACHE_SIZE = int(get_env("MEMBERSHIP_CACHE_SIZE", "50000"))
+
+# GitHub OAuth endpoints (overridable for tests/proxies) and outbound HTTP client limits
+GITHUB_OAUTH_URL = get_env("GITHUB_OAUTH_URL", "https://github.com/login/oauth")
+GITHUB_API_URL = get_env("GITHUB_API_URL", "https://api.github.com")
+GITHUB_HTTP_TIMEOUT = float(get_env("GITHUB_HTTP_TIMEOUT", "5"))
+GITHUB_HTTP_MAX_CONNECTIONS = int(get_env("GITHUB_HTTP_MAX_CONNECTIONS", "20"))
+
+# Pooled SMTP sender (per worker process): connections, messages per batch, idle seconds before disconnecting
+MAIL_POOL_SIZE = int(get_env("MAIL_POOL_SIZE", "2"))
+MAIL_BATCH_SIZE = int(get_env("MAIL_BATCH_SIZE", "50"))
+MAIL_IDLE_TIMEOUT = float(get_env("MAIL_IDLE_TIMEOUT", "30"))
+
+# Background job worker (worker.py): jobs claimed per poll, handlers run at once, retry backoff (seconds)
+JOB_BATCH_SIZE = int(get_env("JOB_BATCH_SIZE", "50"))
+JOB_CONCURRENCY = int(get_env("JOB_CONCURRENCY", "10"))
+JOB_POLL_INTERVAL = float(get_env("JOB_POLL_INTERVAL", "1"))
+JOB_TIMEOUT = float(get_env("JOB_TIMEOUT", "60"))
+JOB_MAX_ATTEMPTS = int(get_env("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE = float(get_env("JOB_RETRY_BASE", "10"))
+JOB_RETRY_MAX = float(get_env("JOB_RETRY_MAX", "3600"))
+
+# Lifetime (seconds) of emailed codes, and how often / in what batch sizes the worker purges expired rows
+VERIFICATION_CODE_TTL = float(get_env("VERIFICATION_CODE_TTL", "86400"))
+PASSWORD_RESET_TTL = float(get_env("PASSWORD_RESET_TTL", "3600"))
+JANITOR_INTERVAL = float(get_env("JANITOR_INTERVAL", "300"))
+JANITOR_BATCH_SIZE = int(get_env("JANITOR_BATCH_SIZE", "500"))
+# Seconds after which a worker that stopped reporting its statistics is dropped from worker_stats
+WORKER_STATS_TTL = float(get_env("WORKER_STATS_TTL", "86400"))
+
 MAIL_CONFIG = ConnectionConfig(
     MAIL_USERNAME=get_env("MAIL_USERNAME"),
     MAIL_PASSWORD=SecretStr(get_env("MAIL_PASSWORD")),
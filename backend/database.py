@@ -1,14 +1,36 @@
-from config import POSTGRES_PASSWORD, POSTGRES_USER, IS_DOCKER
+from config import (
+    POSTGRES_PASSWORD, POSTGRES_USER, IS_DOCKER,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+)
+from helpers.pool_stats import InstrumentedAsyncPool, instrument
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 DB_HOST = "db" if IS_DOCKER else "localhost"
 
 DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{DB_HOST}:5432/{POSTGRES_USER}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{DB_HOST}:5432/{POSTGRES_USER}"
 
-engine = create_engine(DATABASE_URL)
+POOL_OPTIONS = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+# Sync engine: table creation, scripts and tests
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# Async engine: used by the routers so requests don't hold a threadpool slot while waiting on Postgres.
+# expire_on_commit=False because expired attributes can't be lazily refreshed outside an await.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncPool, **POOL_OPTIONS)
+instrument(async_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, autocommit=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -17,3 +39,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,22 +1,26 @@
-from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta, timezone
-from config import JWT_SECRET_KEY
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-from config import GOOGLE_CLIENT_ID
+from config import JWT_SECRET_KEY, BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
+from .passwords import PasswordHasher
+from .google_certs import CertCache, http_cert_source
+from config import GOOGLE_CLIENT_ID, GOOGLE_CERTS_URL
 from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(rounds=BCRYPT_ROUNDS, workers=PASSWORD_HASH_WORKERS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+google_certs = CertCache(http_cert_source(GOOGLE_CERTS_URL))
 
-def hash_password(password: str):
-    return pwd_context.hash(password)
+async def hash_password(password: str):
+    return await password_hasher.hash(password)
 
-def verify_password(plain: str, hashed: str):
-    return pwd_context.verify(plain, hashed)
+async def verify_password(plain: str, hashed: str):
+    valid, _ = await password_hasher.verify_and_update(plain, hashed)
+    return valid
+
+async def verify_and_update_password(plain: str, hashed: str):
+    return await password_hasher.verify_and_update(plain, hashed)
 
 def create_token(data: dict):
     to_encode = data.copy()
@@ -26,16 +30,17 @@ def create_token(data: dict):
 
 def verify_google_token(token: str):
     try:
-        idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), GOOGLE_CLIENT_ID)
+        idinfo = google_certs.verify(token, GOOGLE_CLIENT_ID)
         return idinfo
     except Exception:
         return None
 
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import User
+from .cache import user_cache
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
     if not JWT_SECRET_KEY:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="JWT secret key not set")
     try:
@@ -43,9 +48,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         user_id = payload.get("user_id")
         if user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        cached = user_cache.get(int(user_id))
+        if cached is not None:
+            # Attach the cached copy to this request's session without a SELECT
+            return await db.merge(cached, load=False)
+        user = await db.get(User, int(user_id))
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        user_cache.put(user.id, user)
         return user
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
@@ -0,0 +1,47 @@
+"""
+Bounded in-process TTL caches of ORM rows (authenticated users, organization memberships)
+"""
+from typing import Callable, Hashable
+from cachetools import TTLCache
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from config import USER_CACHE_TTL, USER_CACHE_SIZE, MEMBERSHIP_CACHE_TTL, MEMBERSHIP_CACHE_SIZE
+from models import User, OrganizationMember
+
+class ModelCache:
+    def __init__(self, model, maxsize: int, ttl: float):
+        self.model = model
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        """A detached copy of the cached row; attach it with `await db.merge(obj, load=False)`."""
+        values = self._entries.get(key)
+        if values is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        obj = self.model(**{k: list(v) if isinstance(v, list) else v for k, v in values.items()})
+        make_transient_to_detached(obj)
+        return obj
+
+    def put(self, key: Hashable, obj):
+        # Column values only, so cached entries never share state with a session
+        self._entries[key] = {attr.key: getattr(obj, attr.key) for attr in inspect(self.model).column_attrs}
+
+    def invalidate(self, *keys: Hashable):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]):
+        for key in [k for k in list(self._entries.keys()) if predicate(k)]:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+# keyed by user id
+user_cache = ModelCache(User, maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# keyed by (user_id, organization_id); only memberships that exist are cached
+membership_cache = ModelCache(OrganizationMember, maxsize=MEMBERSHIP_CACHE_SIZE, ttl=MEMBERSHIP_CACHE_TTL)
@@ -1,32 +1,29 @@
-from fastapi_mail import FastMail, MessageSchema, MessageType
-from config import MAIL_CONFIG
+from email.message import EmailMessage
+from email.utils import formataddr
+from config import MAIL_CONFIG, MAIL_POOL_SIZE, MAIL_BATCH_SIZE, MAIL_IDLE_TIMEOUT
 from schemas import EmailDetails
+from .mailer import SMTPPool
+from .templates import email_templates
 
-fm = FastMail(MAIL_CONFIG)
+mailer = SMTPPool(MAIL_CONFIG, size=MAIL_POOL_SIZE, batch_size=MAIL_BATCH_SIZE, idle_timeout=MAIL_IDLE_TIMEOUT)
+
+async def build_message(subject: str, email_details: EmailDetails, template_name: str) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr((MAIL_CONFIG.MAIL_FROM_NAME or "", MAIL_CONFIG.MAIL_FROM))
+    message["To"] = ", ".join(email_details.recipients)
+    html = await email_templates.render(template_name, email_details.body)
+    message.set_content(html, subtype="html")
+    return message
 
 async def send_signup_verification_email(email_details: EmailDetails):
-    message = MessageSchema(
-        subject='Your Alora verification code',
-        recipients=email_details.recipients,
-        template_body=email_details.body,
-        subtype=MessageType.html
-    )
-    await fm.send_message(message, template_name="signup_verification.jinja2")
+    message = await build_message('Your Alora verification code', email_details, "signup_verification.jinja2")
+    await mailer.send(message)
 
 async def send_org_invite_email(email_details: EmailDetails):
-    message = MessageSchema(
-        subject='Organization Invite on Alora',
-        recipients=email_details.recipients,
-        template_body=email_details.body,
-        subtype=MessageType.html
-    )
-    await fm.send_message(message, template_name="org_invite.jinja2")
+    message = await build_message('Organization Invite on Alora', email_details, "org_invite.jinja2")
+    await mailer.send(message)
 
 async def send_password_reset_email(email_details: EmailDetails):
-    message = MessageSchema(
-        subject='Reset your Alora password',
-        recipients=email_details.recipients,
-        template_body=email_details.body,
-        subtype=MessageType.html
-    )
-    await fm.send_message(message, template_name="password_reset.jinja2")
+    message = await build_message('Reset your Alora password', email_details, "password_reset.jinja2")
+    await mailer.send(message)
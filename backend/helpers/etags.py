@@ -0,0 +1,71 @@
+"""
+ETags for per-user endpoints, derived from version counters instead of the response body, so an
+unchanged poll costs one primary-key lookup and no list query.
+
+users.version covers a user's organizations, invites and linked accounts; organizations.version
+covers the organization's detail page (its fields, members and their profiles). Every write that
+changes what those endpoints return calls `bump_versions` in its own transaction.
+"""
+import hashlib
+from fastapi import Request, Response
+from sqlalchemy import Select, select, union, update
+from sqlalchemy.sql.expression import SelectBase
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Organization, OrganizationInvite, OrganizationMember, User
+
+# Browsers keep the body and revalidate it on every request
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(request: Request, *parts) -> str:
+    """Strong ETag for `request`'s path and the versions (and ids) the response depends on."""
+    key = ":".join([request.url.path, *map(str, parts)])
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """A 304 when If-None-Match already has `etag`, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+async def user_version(db: AsyncSession, user_id: int) -> int | None:
+    # Read fresh every time: the authenticated user may come from the cache
+    return await db.scalar(select(User.version).filter_by(id=user_id))
+
+def org_audience(org_id: int) -> SelectBase:
+    """Users whose dashboards show the organization: its members and the users invited to it."""
+    return union(
+        select(OrganizationMember.user_id).where(OrganizationMember.organization_id == org_id),
+        select(OrganizationInvite.target_user_id).where(OrganizationInvite.org_id == org_id),
+    )
+
+def member_organizations(*user_ids: int) -> Select:
+    """Organizations whose member lists show any of the users."""
+    return select(OrganizationMember.organization_id).where(OrganizationMember.user_id.in_(user_ids))
+
+async def _bump(db: AsyncSession, model, ids):
+    if not isinstance(ids, SelectBase):
+        ids = sorted({i for i in ids if i is not None})
+        if not ids:
+            return
+    # Lock in id order, so concurrent bumps of overlapping sets can't deadlock
+    locked = select(model.id).where(model.id.in_(ids)).order_by(model.id).with_for_update(key_share=True)
+    await db.execute(
+        update(model).where(model.id.in_(locked.scalar_subquery())).values(version=model.version + 1),
+        execution_options={"synchronize_session": False},
+    )
+
+async def bump_versions(db: AsyncSession, user_ids=(), org_ids=()):
+    """
+    Move the ETags of the given users' dashboards and organizations' detail pages. Both accept ids or
+    a select of ids (see `org_audience`, `member_organizations`). Call it before writing to the
+    users or organizations rows themselves: organizations are always locked before users.
+    """
+    await _bump(db, Organization, org_ids)
+    await _bump(db, User, user_ids)
@@ -0,0 +1,92 @@
+"""
+GitHub OAuth: code exchange and profile lookup over one shared, pooled async HTTP client
+"""
+import asyncio
+import httpx
+from fastapi import HTTPException
+from config import (
+    VITE_GITHUB_CLIENT_ID, GITHUB_CLIENT_SECRET,
+    GITHUB_OAUTH_URL, GITHUB_API_URL, GITHUB_HTTP_TIMEOUT, GITHUB_HTTP_MAX_CONNECTIONS,
+)
+
+try:
+    import h2  # noqa: F401  (httpx negotiates HTTP/2 over TLS only when h2 is installed)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+OAUTH_URL = GITHUB_OAUTH_URL.rstrip("/")
+API_URL = GITHUB_API_URL.rstrip("/")
+
+_client: httpx.AsyncClient | None = None
+
+def get_client() -> httpx.AsyncClient:
+    """The process-wide client; keeps connections to GitHub alive between logins."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=httpx.Timeout(GITHUB_HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=GITHUB_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=GITHUB_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+            headers={"Accept": "application/json"},
+        )
+    return _client
+
+async def aclose():
+    # The client's connections belong to the event loop that opened them
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def exchange_code(code: str) -> str:
+    client = get_client()
+    try:
+        response = await client.post(
+            f"{OAUTH_URL}/access_token",
+            data={
+                "client_id": VITE_GITHUB_CLIENT_ID,
+                "client_secret": GITHUB_CLIENT_SECRET,
+                "code": code,
+            },
+        )
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Failed to reach GitHub")
+    if response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to get GitHub token")
+    access_token = response.json().get("access_token")
+    if not access_token:
+        raise HTTPException(status_code=400, detail="No access token from GitHub")
+    return access_token
+
+async def fetch_profile(code: str) -> tuple[dict, str]:
+    """Exchange an OAuth `code` and return the GitHub user and their (primary) email."""
+    access_token = await exchange_code(code)
+    client = get_client()
+    headers = {"Authorization": f"Bearer {access_token}"}
+    # /user/emails is only needed when the profile email is private, but asking for
+    # both at once saves a round trip in that case and costs little otherwise
+    user_resp, emails_resp = await asyncio.gather(
+        client.get(f"{API_URL}/user", headers=headers),
+        client.get(f"{API_URL}/user/emails", headers=headers),
+        return_exceptions=True,
+    )
+    if isinstance(user_resp, Exception):
+        if isinstance(user_resp, httpx.HTTPError):
+            raise HTTPException(status_code=502, detail="Failed to reach GitHub")
+        raise user_resp
+    if user_resp.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to get GitHub user info")
+    user_data = user_resp.json()
+    email = user_data.get("email")
+    if not email and isinstance(emails_resp, httpx.Response) and emails_resp.status_code == 200:
+        emails = emails_resp.json()
+        primary = next((e for e in emails if e.get("primary")), None)
+        email = primary["email"] if primary else emails[0]["email"] if emails else None
+    if not email:
+        raise HTTPException(status_code=400, detail="GitHub email not found")
+    return user_data, email
@@ -0,0 +1,95 @@
+"""
+Google ID token verification against a locally cached copy of Google's signing certificates
+"""
+import base64
+import json
+import re
+import threading
+import time
+from typing import Callable
+import requests
+from google.auth import jwt as google_jwt
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# A cert source returns ({key id: PEM certificate}, seconds the set may be cached for)
+CertSource = Callable[[], tuple[dict[str, str], float]]
+
+def http_cert_source(url: str, timeout: float = 5) -> CertSource:
+    def fetch():
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        match = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+        max_age = int(match.group(1)) if match else 0
+        # Age is how long the response already sat in an intermediate cache
+        max_age -= int(response.headers.get("Age", "0") or 0)
+        return response.json(), max_age
+    return fetch
+
+def _key_id(token: str) -> str | None:
+    header = token.split(".", 1)[0]
+    try:
+        return json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4))).get("kid")
+    except ValueError:
+        return None
+
+class CertCache:
+    """
+    Google's certs, refreshed in a background thread shortly before their max-age runs out.
+    Only the very first verification (or one after the certs lapsed entirely) waits on the network.
+    """
+
+    def __init__(self, source: CertSource, refresh_before: float = 300, min_ttl: float = 60):
+        self.source = source
+        self.refresh_before = refresh_before
+        self.min_ttl = min_ttl
+        self._certs: dict[str, str] | None = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.fetches = 0
+
+    def _refresh(self):
+        certs, max_age = self.source()
+        self.fetches += 1
+        self._fetched_at = time.monotonic()
+        self._certs = certs
+        self._expires_at = self._fetched_at + max(max_age, self.min_ttl)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self._refresh()
+        except Exception:
+            # Keep serving the current certs; the next verification will try again
+            pass
+        finally:
+            self._refreshing = False
+
+    def get(self, force: bool = False) -> dict[str, str]:
+        now = time.monotonic()
+        if force or self._certs is None or now >= self._expires_at:
+            with self._lock:
+                if force or self._certs is None or time.monotonic() >= self._expires_at:
+                    self._refresh()
+        elif now >= self._expires_at - self.refresh_before:
+            self._refresh_in_background()
+        return self._certs  # type: ignore[return-value]
+
+    def verify(self, token: str, audience: str) -> dict:
+        """Claims of a valid Google ID token for `audience`; raises ValueError otherwise."""
+        certs = self.get()
+        if _key_id(token) not in certs and time.monotonic() - self._fetched_at > self.min_ttl:
+            # Google may have rotated keys ahead of our expiry
+            certs = self.get(force=True)
+        idinfo = google_jwt.decode(token, certs=certs, audience=audience)
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+        return idinfo
@@ -0,0 +1,88 @@
+"""
+Expiry for verification codes, password resets and invites, and the sweeper that purges them.
+
+Request handlers treat a row past its TTL as gone. worker.py runs `sweep` every JANITOR_INTERVAL
+seconds, deleting expired rows JANITOR_BATCH_SIZE at a time, each batch in its own short transaction
+so locks are held only briefly and the API never waits on a big purge. The worker publishes `stats`
+to worker_stats after each sweep, and GET /admin/stats/janitor serves them.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import VERIFICATION_CODE_TTL, PASSWORD_RESET_TTL, JANITOR_BATCH_SIZE, JANITOR_INTERVAL, WORKER_STATS_TTL
+from database import AsyncSessionLocal
+from helpers.etags import bump_versions
+from models import VerificationCode, PasswordReset, OrganizationInvite, WorkerStats
+
+logger = logging.getLogger("janitor")
+
+def expiry_cutoff(ttl: float) -> datetime:
+    """Rows created before this are expired."""
+    return datetime.now(timezone.utc) - timedelta(seconds=ttl)
+
+def expired_conditions():
+    """Table -> WHERE clause matching its expired rows."""
+    now = datetime.now(timezone.utc)
+    return {
+        VerificationCode: VerificationCode.created_at < expiry_cutoff(VERIFICATION_CODE_TTL),
+        PasswordReset: PasswordReset.created_at < expiry_cutoff(PASSWORD_RESET_TTL),
+        OrganizationInvite: or_(OrganizationInvite.expires_at < now, OrganizationInvite.uses >= OrganizationInvite.max_uses),
+        WorkerStats: WorkerStats.updated_at < expiry_cutoff(WORKER_STATS_TTL),
+    }
+
+class JanitorStats:
+    def __init__(self):
+        self.runs = 0
+        self.reclaimed: dict[str, int] = {}
+        self.last_reclaimed: dict[str, int] = {}
+        self.last_run_at: datetime | None = None
+        self.last_duration_ms = 0.0
+
+    def snapshot(self) -> dict:
+        last_total = sum(self.last_reclaimed.values())
+        return {
+            "interval": JANITOR_INTERVAL,
+            "runs": self.runs,
+            "reclaimed": dict(self.reclaimed),
+            "last_reclaimed": dict(self.last_reclaimed),
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": round(self.last_duration_ms, 3),
+            "last_rows_per_second": round(last_total / (self.last_duration_ms / 1000), 3) if self.last_duration_ms else 0.0,
+        }
+
+stats = JanitorStats()
+
+async def delete_batch(db: AsyncSession, model, condition, batch_size: int) -> int:
+    # Rows another transaction is using (e.g. an accept in progress) are skipped, not waited on
+    ids = select(model.id).where(condition).order_by(model.id).limit(batch_size).with_for_update(skip_locked=True)
+    statement = delete(model).where(model.id.in_(ids.scalar_subquery()))
+    if model is OrganizationInvite:
+        # The targets' invite lists change, so their ETags have to move
+        targets = (await db.scalars(statement.returning(OrganizationInvite.target_user_id))).all()
+        await bump_versions(db, user_ids=targets)
+        return len(targets)
+    deleted = (await db.scalars(statement.returning(model.id))).all()
+    return len(deleted)
+
+async def sweep(batch_size: int = JANITOR_BATCH_SIZE) -> dict[str, int]:
+    """Delete every expired row, one batch per transaction; returns rows reclaimed per table."""
+    started = time.perf_counter()
+    reclaimed = {}
+    for model, condition in expired_conditions().items():
+        total = 0
+        while True:
+            async with AsyncSessionLocal() as db, db.begin():
+                count = await delete_batch(db, model, condition, batch_size)
+            total += count
+            if count < batch_size:
+                break
+        reclaimed[model.__tablename__] = total
+        stats.reclaimed[model.__tablename__] = stats.reclaimed.get(model.__tablename__, 0) + total
+    stats.runs += 1
+    stats.last_reclaimed = reclaimed
+    stats.last_run_at = datetime.now(timezone.utc)
+    stats.last_duration_ms = (time.perf_counter() - started) * 1000
+    logger.info("sweep reclaimed %s in %.0f ms", reclaimed, stats.last_duration_ms)
+    return reclaimed
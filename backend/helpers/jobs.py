@@ -0,0 +1,36 @@
+"""
+Durable background jobs: the request path adds a row to `jobs`, worker.py runs it
+"""
+from typing import Awaitable, Callable
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import JOB_MAX_ATTEMPTS
+from models import Job
+from schemas import EmailDetails
+from . import emails
+
+def _email_job(send: Callable[[EmailDetails], Awaitable[None]]) -> Callable[[dict], Awaitable[None]]:
+    async def run(payload: dict):
+        await send(EmailDetails.model_validate(payload))
+    return run
+
+# Job kind -> coroutine taking the job's payload
+HANDLERS: dict[str, Callable[[dict], Awaitable[None]]] = {
+    "signup_verification_email": _email_job(emails.send_signup_verification_email),
+    "org_invite_email": _email_job(emails.send_org_invite_email),
+    "password_reset_email": _email_job(emails.send_password_reset_email),
+}
+
+def enqueue(db: AsyncSession, kind: str, payload: dict, max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    """Add a job to `db`; it is committed (or rolled back) together with the caller's other changes."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(kind=kind, payload=payload, max_attempts=max_attempts)
+    db.add(job)
+    return job
+
+def enqueue_email(db: AsyncSession, kind: str, email_details: EmailDetails) -> Job:
+    return enqueue(db, kind, email_details.model_dump(mode="json"))
+
+def enqueue_emails(db: AsyncSession, kind: str, email_details: list[EmailDetails]) -> list[Job]:
+    """Batch form of enqueue_email; the flush writes all the rows in a single multi-row INSERT."""
+    return [enqueue_email(db, kind, details) for details in email_details]
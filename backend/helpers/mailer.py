@@ -0,0 +1,169 @@
+"""
+Pooled SMTP sender: queued messages go out in batches over long-lived, already authenticated connections
+"""
+import asyncio
+import time
+from email.message import EmailMessage
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
+
+# Errors after which a connection is dropped and the message retried once on a fresh one
+CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, aiosmtplib.SMTPTimeoutError, OSError)
+
+class MailerStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.monotonic()
+        self.sent = 0
+        self.failed = 0
+        self.suppressed = 0
+        self.batches = 0
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.latency_total_ms = 0.0
+        self.latency_max_ms = 0.0
+
+    def observe_sent(self, queued_at: float):
+        ms = (time.perf_counter() - queued_at) * 1000
+        self.sent += 1
+        self.latency_total_ms += ms
+        self.latency_max_ms = max(self.latency_max_ms, ms)
+
+    def snapshot(self, queued: int) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "suppressed": self.suppressed,
+            "queued": queued,
+            "batches": self.batches,
+            "avg_batch_size": round(self.sent / self.batches, 2) if self.batches else 0.0,
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "messages_per_second": round(self.sent / elapsed, 3) if elapsed else 0.0,
+            "latency": {
+                "avg_ms": round(self.latency_total_ms / self.sent, 3) if self.sent else 0.0,
+                "max_ms": round(self.latency_max_ms, 3),
+            },
+        }
+
+class SMTPPool:
+    """
+    `size` sender tasks, each owning one SMTP connection. A sender drains up to `batch_size`
+    queued messages per wakeup and sends them back to back on its connection, which is kept
+    open between batches and closed after `idle_timeout` seconds without mail.
+    """
+
+    def __init__(self, config: ConnectionConfig, size: int = 2, batch_size: int = 50, idle_timeout: float = 30):
+        self.config = config
+        self.size = size
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self.stats = MailerStats()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._senders: list[asyncio.Task] = []
+
+    async def send(self, message: EmailMessage):
+        """Queue `message` and wait until it has been handed to the SMTP server."""
+        if self.config.SUPPRESS_SEND:
+            self.stats.suppressed += 1
+            return
+        queue = self._start()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((message, future, time.perf_counter()))
+        await future
+
+    def snapshot(self) -> dict:
+        return self.stats.snapshot(self._queue.qsize() if self._queue else 0)
+
+    async def close(self):
+        senders, self._senders = self._senders, []
+        for task in senders:
+            task.cancel()
+        await asyncio.gather(*senders, return_exceptions=True)
+        self._queue = None
+        self._loop = None
+
+    def _start(self) -> asyncio.Queue:
+        # Connections belong to the event loop that opened them, so a new loop gets new senders
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._senders = [loop.create_task(self._sender(self._queue)) for _ in range(self.size)]
+        return self._queue
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        config = self.config
+        smtp = aiosmtplib.SMTP(
+            hostname=config.MAIL_SERVER,
+            port=config.MAIL_PORT,
+            use_tls=config.MAIL_SSL_TLS,
+            start_tls=config.MAIL_STARTTLS,
+            validate_certs=config.VALIDATE_CERTS,
+            timeout=config.TIMEOUT,
+            local_hostname=config.LOCAL_HOSTNAME,
+        )
+        await smtp.connect()
+        if config.USE_CREDENTIALS:
+            await smtp.login(config.MAIL_USERNAME, config.MAIL_PASSWORD.get_secret_value())
+        self.stats.connections_opened += 1
+        return smtp
+
+    async def _sender(self, queue: asyncio.Queue):
+        smtp: aiosmtplib.SMTP | None = None
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if smtp is not None:
+                        await self._quit(smtp)
+                        smtp = None
+                    continue
+                batch = [item]
+                while len(batch) < self.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                self.stats.batches += 1
+                for message, future, queued_at in batch:
+                    smtp = await self._deliver(smtp, message, future, queued_at)
+        finally:
+            if smtp is not None:
+                smtp.close()
+
+    async def _deliver(self, smtp, message, future, queued_at):
+        for attempt in range(2):
+            try:
+                if smtp is None or not smtp.is_connected:
+                    smtp = await self._connect()
+                await smtp.send_message(message)
+            except CONNECTION_ERRORS as exc:
+                if smtp is not None:
+                    smtp.close()
+                smtp = None
+                if attempt == 0:
+                    self.stats.reconnects += 1
+                    continue
+                self._fail(future, exc)
+            except Exception as exc:
+                self._fail(future, exc)
+            else:
+                self.stats.observe_sent(queued_at)
+                if not future.done():
+                    future.set_result(None)
+            break
+        return smtp
+
+    def _fail(self, future: asyncio.Future, exc: Exception):
+        self.stats.failed += 1
+        if not future.done():
+            future.set_exception(exc)
+
+    async def _quit(self, smtp: aiosmtplib.SMTP):
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
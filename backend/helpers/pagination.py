@@ -0,0 +1,33 @@
+"""
+Opaque keyset cursors shared by the paginated list endpoints
+"""
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+def encode_cursor(*values) -> str:
+    # Datetimes are tagged so they come back as datetimes and compare correctly in SQL
+    raw = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """
+    Values of a cursor made by `encode_cursor`, checked against the Python type expected at each
+    position, so a tampered cursor is a 400 and not a failed bind or comparison in SQL.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("cursor size mismatch")
+        values = [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in raw]
+        for value, expected in zip(values, types):
+            # bool is an int, and ids are bigints
+            if not isinstance(value, expected) or isinstance(value, bool) and expected is not bool:
+                raise TypeError("cursor value type mismatch")
+            if isinstance(value, int) and not -2**63 <= value < 2**63:
+                raise ValueError("cursor value out of range")
+        return values
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,51 @@
+"""
+bcrypt hashing on a dedicated process pool, so a burst of logins doesn't stall the event loop
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from passlib.context import CryptContext
+
+@lru_cache(maxsize=None)
+def build_context(rounds: int) -> CryptContext:
+    # min == max == rounds makes needs_update() flag hashes made with any other cost
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+# These run inside the worker processes
+
+def _hash(password: str, rounds: int) -> str:
+    return build_context(rounds).hash(password)
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    return build_context(rounds).verify_and_update(password, hashed)
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent runs an event loop and worker threads
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), _hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """Check `password`; the second item is a new hash when `hashed` used a different cost."""
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), _verify_and_update, password, hashed, self.rounds)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
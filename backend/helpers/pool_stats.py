@@ -0,0 +1,96 @@
+"""
+Connection pool instrumentation for the async engine (numbers are per worker process)
+"""
+import time
+from config import DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds (in milliseconds) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+class PoolStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connections_invalidated = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float):
+        ms = seconds * 1000
+        self.wait_total_ms += ms
+        self.wait_max_ms = max(self.wait_max_ms, ms)
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if ms <= bound:
+                self.wait_buckets[i] += 1
+                return
+        self.wait_buckets[-1] += 1
+
+    def snapshot(self, pool) -> dict:
+        waits = sum(self.wait_buckets)
+        buckets = {f"le_{bound}ms": n for bound, n in zip(WAIT_BUCKETS_MS, self.wait_buckets)}
+        buckets["inf"] = self.wait_buckets[-1]
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "timeout": pool.timeout(),
+            "recycle": DB_POOL_RECYCLE,
+            "pre_ping": DB_POOL_PRE_PING,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connections_opened": self.connections_opened,
+            "connections_closed": self.connections_closed,
+            "connections_invalidated": self.connections_invalidated,
+            "wait": {
+                "count": waits,
+                "total_ms": round(self.wait_total_ms, 3),
+                "avg_ms": round(self.wait_total_ms / waits, 3) if waits else 0.0,
+                "max_ms": round(self.wait_max_ms, 3),
+                "buckets": buckets,
+            },
+        }
+
+pool_stats = PoolStats()
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        # _do_get is where QueuePool blocks for a free slot (or opens a new connection)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            pool_stats.observe_wait(time.perf_counter() - start)
+
+def instrument(engine):
+    """Count checkouts and connection churn on `engine`'s pool."""
+    @event.listens_for(engine.pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_stats.connections_opened += 1
+
+    @event.listens_for(engine.pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        pool_stats.connections_closed += 1
+
+    @event.listens_for(engine.pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_stats.connections_invalidated += 1
+
+    @event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_stats.checkouts += 1
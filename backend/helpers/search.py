@@ -0,0 +1,32 @@
+"""
+Helpers for the name/email search filters
+"""
+from sqlalchemy import Float, Select, literal, or_, select
+from models import User, USER_SEARCH_TEXT
+
+LIKE_ESCAPE = "\\"
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input matches literally; pair with escape=LIKE_ESCAPE."""
+    return value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", LIKE_ESCAPE + "%").replace("_", LIKE_ESCAPE + "_")
+
+def contains_pattern(value: str) -> str:
+    return f"%{escape_like(value.strip())}%"
+
+def user_search(q: str, limit: int) -> Select:
+    """
+    (User, score) rows for the users best matching `q` in their username, email or full name.
+    Substring and fuzzy (trigram word similarity) matches both come from ix_users_search_trgm;
+    ordering by the `<<->` distance lets Postgres read the top `limit` straight off that index.
+    """
+    term = q.strip()
+    # Parenthesised: `||` and the trigram operators share a precedence level
+    text = USER_SEARCH_TEXT.self_group()
+    distance = literal(term).op("<<->", return_type=Float)(text)
+    return select(User, (1 - distance).label("score")) \
+        .where(or_(
+            text.ilike(contains_pattern(term), escape=LIKE_ESCAPE),
+            literal(term).op("<%", is_comparison=True)(text),
+        )) \
+        .order_by(distance, User.id) \
+        .limit(limit)
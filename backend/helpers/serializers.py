@@ -0,0 +1,21 @@
+"""
+List responses encoded in one pass, skipping FastAPI's second walk over the data.
+
+A route returning a plain dict has every value run through jsonable_encoder, and one with a
+response_model has its return value validated and dumped again. Hot list endpoints instead
+return ORJSONResponse (orjson encodes datetimes itself) or `model_response`.
+"""
+from functools import lru_cache
+from typing import Any
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+@lru_cache(maxsize=None)
+def adapter(tp: Any) -> TypeAdapter:
+    # Building the adapter compiles the validator and serializer, so do it once per type
+    return TypeAdapter(tp)
+
+def model_response(tp: Any, value: Any, **kwargs) -> Response:
+    """`value` (ORM objects, rows or dicts) read as `tp` and dumped to JSON bytes by pydantic-core."""
+    ta = adapter(tp)
+    return Response(ta.dump_json(ta.validate_python(value, from_attributes=True)), media_type="application/json", **kwargs)
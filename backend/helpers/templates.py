@@ -0,0 +1,80 @@
+"""
+Email templates compiled once per process and recompiled only when a file's mtime changes
+"""
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from fastapi.concurrency import run_in_threadpool
+from jinja2 import Environment, FileSystemLoader, Template
+from config import MAIL_CONFIG
+
+@dataclass
+class CachedTemplate:
+    mtime_ns: int
+    source: str
+    template: Template | None
+
+class TemplateCache:
+    """
+    `*.jinja2` files under `directory`, compiled on first use. The directory is re-scanned at most
+    every `check_interval` seconds, and only files whose mtime changed are read and compiled again.
+    """
+
+    def __init__(self, directory: Path, check_interval: float = 2):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        # Same environment fastapi-mail used, so templates render exactly as before
+        self.env = Environment(loader=FileSystemLoader(self.directory))
+        self.etag = ""
+        self._templates: dict[str, CachedTemplate] = {}
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        """Pick up added, changed and removed templates (blocking file IO)."""
+        if not force and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            try:
+                entries = {e.name: e.stat().st_mtime_ns for e in os.scandir(self.directory) if e.name.endswith(".jinja2")}
+            except OSError:
+                entries = {}
+            templates = {}
+            for name, mtime_ns in entries.items():
+                cached = self._templates.get(name)
+                if cached is not None and cached.mtime_ns == mtime_ns:
+                    templates[name] = cached
+                    continue
+                try:
+                    source = (self.directory / name).read_text(encoding="utf-8")
+                    templates[name] = CachedTemplate(mtime_ns, source, self.env.from_string(source))
+                except Exception:
+                    templates[name] = CachedTemplate(mtime_ns, "(not available)", None)
+            if templates.keys() != self._templates.keys() or any(templates[n] is not self._templates[n] for n in templates):
+                digest = hashlib.sha256()
+                for name in sorted(templates):
+                    digest.update(f"{name}\0{templates[name].mtime_ns}\0".encode())
+                self.etag = f'"{digest.hexdigest()[:32]}"'
+            self._templates = templates
+            self._checked_at = time.monotonic()
+
+    def sources(self) -> tuple[str, dict[str, str]]:
+        """ETag and raw source of every template, for the admin preview."""
+        self.refresh()
+        return self.etag, {name: t.source for name, t in sorted(self._templates.items())}
+
+    def render_sync(self, name: str, context: dict) -> str:
+        self.refresh()
+        cached = self._templates.get(name)
+        if cached is None or cached.template is None:
+            raise LookupError(f"Email template {name!r} not found")
+        return cached.template.render(**context)
+
+    async def render(self, name: str, context: dict) -> str:
+        # Rendering (and the occasional mtime check) runs in the threadpool, not on the event loop
+        return await run_in_threadpool(self.render_sync, name, context)
+
+email_templates = TemplateCache(MAIL_CONFIG.TEMPLATE_FOLDER)
@@ -0,0 +1,29 @@
+"""
+Statistics that live in the worker process (mail sent by the job handlers, the janitor's sweeps),
+published to the worker_stats table so the API's admin endpoints can show them. One row per worker process.
+"""
+import os
+import socket
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import WorkerStats
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+async def publish(db: AsyncSession, stats: dict):
+    """Replace this process's row with `stats` (section name -> snapshot)."""
+    await db.execute(
+        insert(WorkerStats)
+        .values(worker=WORKER_ID, stats=stats)
+        .on_conflict_do_update(index_elements=["worker"], set_={"stats": stats, "updated_at": func.now()})
+    )
+
+async def section(db: AsyncSession, name: str) -> list[dict]:
+    """Every worker's `name` snapshot with the worker's id and when it reported, latest first."""
+    rows = (await db.execute(
+        select(WorkerStats.worker, WorkerStats.updated_at, WorkerStats.stats[name])
+        .where(WorkerStats.stats.has_key(name))
+        .order_by(WorkerStats.updated_at.desc())
+    )).all()
+    return [{"worker": worker, "updated_at": updated_at, **snapshot} for worker, updated_at, snapshot in rows]
@@ -1,10 +1,17 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import models
-from database import engine
+from database import engine, async_engine
+from helpers.auth import password_hasher
+from helpers import github
+from helpers.emails import mailer
+from helpers.templates import email_templates
 
 from routers.userRouter import router as user_router
 from routers.orgRouter import router as org_router
@@ -12,7 +19,17 @@ from routers.adminRouter import router as admin_router
 
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the email templates before the first request needs them
+    await run_in_threadpool(email_templates.refresh, True)
+    yield
+    password_hasher.shutdown()
+    await github.aclose()
+    await mailer.close()
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost",
@@ -0,0 +1,53 @@
+"""
+Maintenance commands, run next to the API against the database configured in .env.
+
+    python manage.py create-indexes
+
+create-indexes builds the declared indexes a deployed database lacks (create_all only builds indexes
+along with their table) with CREATE INDEX CONCURRENTLY, so writes to the tables carry on while they
+build. The API and the worker only log a warning at startup when an index is missing.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import logging
+from sqlalchemy import Engine, text
+from sqlalchemy.schema import CreateIndex, DropIndex
+from database import engine
+import models
+
+logger = logging.getLogger("manage")
+
+def create_indexes(bind: Engine = engine) -> list[str]:
+    """Build the missing indexes concurrently and return their names."""
+    # CONCURRENTLY can't run inside a transaction block
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        # one build at a time: a second run would drop the first one's unfinished (invalid) index
+        connection.execute(text("SELECT pg_advisory_lock(hashtext('create_indexes'))"))
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        built = []
+        for index in models.missing_indexes(connection):
+            logger.info("building %s on %s", index.name, index.table.name)
+            index.dialect_kwargs["postgresql_concurrently"] = True
+            try:
+                # a failed concurrent build leaves an invalid index behind, which IF NOT EXISTS would keep
+                connection.execute(DropIndex(index, if_exists=True))
+                connection.execute(CreateIndex(index, if_not_exists=True))
+            finally:
+                # the same Index objects back create_all, which runs in a transaction
+                index.dialect_kwargs["postgresql_concurrently"] = False
+            built.append(index.name)
+        connection.execute(text("SELECT pg_advisory_unlock(hashtext('create_indexes'))"))
+    return built
+
+COMMANDS = {
+    "create-indexes": create_indexes,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance commands")
+    parser.add_argument("command", choices=COMMANDS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    COMMANDS[args.command]()
@@ -1,10 +1,54 @@
+import logging
 from datetime import datetime
 from database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import text, DateTime, ForeignKey, String, Integer, UniqueConstraint
+from sqlalchemy import text, literal_column, event, DDL, BigInteger, DateTime, ForeignKey, String, Integer, UniqueConstraint, Index
 from sqlalchemy.sql import func
 import sqlalchemy.dialects.postgresql
 
+logger = logging.getLogger("models")
+
+# pg_trgm provides the GIN operator classes behind the substring/fuzzy search indexes
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+def missing_indexes(connection) -> list[Index]:
+    """
+    Declared indexes on existing tables that the database lacks, or has only as the invalid leftover
+    of a failed CONCURRENTLY build. Indexes of tables that don't exist yet come with the table.
+    """
+    tables = set(connection.scalars(text("SELECT tablename FROM pg_tables WHERE schemaname = current_schema()")))
+    valid = set(connection.scalars(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relnamespace = current_schema()::regnamespace AND i.indisvalid"
+    )))
+    return [
+        index for table in Base.metadata.sorted_tables if table.name in tables
+        for index in table.indexes if index.name not in valid
+    ]
+
+@event.listens_for(Base.metadata, "after_create")
+def warn_missing_indexes(metadata, connection, **kw):
+    # create_all only builds indexes along with their table, so ones added to an existing table never
+    # reach a deployed database. Building them here would block writes to the table at every API and
+    # worker startup; `python manage.py create-indexes` builds them CONCURRENTLY instead.
+    missing = missing_indexes(connection)
+    if missing:
+        logger.warning("missing indexes %s, run `python manage.py create-indexes`", ", ".join(index.name for index in missing))
+
+# Columns added to tables that already exist in deployed databases, which create_all leaves alone.
+# The catalog check keeps routine startups from taking a table lock; IF NOT EXISTS covers the API
+# and the worker adding it at the same moment.
+ADDED_COLUMNS = [
+    ("users", "version", "bigint NOT NULL DEFAULT 0"),
+    ("organizations", "version", "bigint NOT NULL DEFAULT 0"),
+]
+for table, column, definition in ADDED_COLUMNS:
+    event.listen(Base.metadata, "after_create", DDL(
+        f"DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema = current_schema() "
+        f"AND table_name = '{table}' AND column_name = '{column}') THEN "
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}; END IF; END $$"
+    ))
+
 class User(Base):
     __tablename__ = "users"
 
@@ -30,9 +74,26 @@ class User(Base):
     created_organizations = relationship("Organization", back_populates="created_by")
     organizations = relationship("OrganizationMember", back_populates="user", cascade="all, delete-orphan")
     is_admin: Mapped[bool] = mapped_column(default=False)
+    # Bumped whenever the user's organizations, invites or linked accounts change (helpers/etags.py)
+    version: Mapped[int] = mapped_column(BigInteger, server_default="0")
     invites = relationship("OrganizationInvite", back_populates="target_user", cascade="all, delete-orphan")
     linked_accounts = relationship("LinkedAccount", back_populates="user", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination / sorting for the admin user table
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_auth_provider_created_at_id", "auth_provider", "created_at", "id"),
+        Index("ix_users_admins", "id", postgresql_where=text("is_admin")),
+        # Prefix (LIKE 'abc%') filters regardless of the database collation
+        Index("ix_users_email_pattern", "email", postgresql_ops={"email": "text_pattern_ops"}),
+        Index("ix_users_username_pattern", "username", postgresql_ops={"username": "text_pattern_ops"}),
+    )
+
+# What the user search endpoints match against (see helpers/search.py). The separator is an inline
+# literal rather than a bound parameter so queries use exactly the indexed expression.
+USER_SEARCH_TEXT = User.username + literal_column("' '") + User.email + literal_column("' '") + User.full_name
+Index("ix_users_search_trgm", USER_SEARCH_TEXT.label("search_text"), postgresql_using="gist", postgresql_ops={"search_text": "gist_trgm_ops"})
+
 class VerificationCode(Base):
     __tablename__ = "verification_codes"
 
@@ -40,7 +101,7 @@ class VerificationCode(Base):
     email: Mapped[str] = mapped_column(ForeignKey("users.email"), unique=True)
     code: Mapped[int] = mapped_column()
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
 
 class PasswordReset(Base):
     __tablename__ = "password_resets"
@@ -49,7 +110,7 @@ class PasswordReset(Base):
     email: Mapped[str] = mapped_column(ForeignKey('users.email'), unique=True)
     code: Mapped[str] = mapped_column(unique=True)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
 
 class Organization(Base):
     __tablename__ = "organizations"
@@ -57,11 +118,19 @@ class Organization(Base):
     name: Mapped[str] = mapped_column(String, unique=True, index=True)
     created_by_user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Bumped whenever the organization, its members or their profiles change (helpers/etags.py)
+    version: Mapped[int] = mapped_column(BigInteger, server_default="0")
 
     created_by = relationship("User", back_populates="created_organizations")
     members = relationship("OrganizationMember", back_populates="organization", cascade="all, delete-orphan")
     invites = relationship("OrganizationInvite", back_populates="organization", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_organizations_created_at_id", "created_at", "id"),
+        # Case-insensitive substring search (name ILIKE '%abc%')
+        Index("ix_organizations_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
 class OrganizationMember(Base):
     __tablename__ = "organization_members"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -75,6 +144,8 @@ class OrganizationMember(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "organization_id", name="uq_user_org"),
+        # uq_user_org leads with user_id, so per-organization counts/listings need their own index
+        Index("ix_organization_members_org_id", "organization_id", "id"),
     )
 
 class OrganizationInvite(Base):
@@ -86,7 +157,7 @@ class OrganizationInvite(Base):
     uses: Mapped[int] = mapped_column(Integer, default=0)
     max_uses: Mapped[int] = mapped_column(Integer, default=1)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
 
     organization = relationship("Organization", back_populates="invites")
     target_user = relationship("User", back_populates="invites")
@@ -104,4 +175,29 @@ class LinkedAccount(Base):
     picture_url: Mapped[str | None] = mapped_column(default=None)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("User", back_populates="linked_accounts")
\ No newline at end of file
+    user = relationship("User", back_populates="linked_accounts")
+class Job(Base):
+    """A unit of background work (e.g. an email) waiting for worker.py; rows are deleted once they succeed."""
+    __tablename__ = "jobs"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column()
+    payload: Mapped[dict] = mapped_column(sqlalchemy.dialects.postgresql.JSONB, default=dict)
+    status: Mapped[str] = mapped_column(default="pending")  # "pending" or "failed" (out of attempts)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5)
+    last_error: Mapped[str | None] = mapped_column(nullable=True)
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # The worker's claim query only ever looks at due, pending jobs
+        Index("ix_jobs_pending_run_at", "run_at", "id", postgresql_where=text("status = 'pending'")),
+    )
+
+class WorkerStats(Base):
+    """What each worker.py process last reported about itself (helpers/worker_stats.py)."""
+    __tablename__ = "worker_stats"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    worker: Mapped[str] = mapped_column(unique=True)  # host:pid
+    stats: Mapped[dict] = mapped_column(sqlalchemy.dialects.postgresql.JSONB, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
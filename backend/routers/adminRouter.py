@@ -1,14 +1,25 @@
 """
 Admin router for global admin interface (user/org management)
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-import os
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Request
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timezone
+from typing import Literal
+from database import get_async_db, async_engine
 from helpers.admin_auth import admin_required
-from models import User, Organization
-from pydantic import BaseModel
+from helpers.pagination import encode_cursor, decode_cursor
+from helpers.pool_stats import pool_stats
+from helpers.search import LIKE_ESCAPE, contains_pattern, user_search
+from helpers import worker_stats
+from helpers.templates import email_templates
+from helpers.cache import user_cache, membership_cache
+from helpers.etags import bump_versions, etag_headers, member_organizations, not_modified, org_audience
+from models import User, Organization, OrganizationMember, OrganizationInvite, LinkedAccount, VerificationCode, PasswordReset
+from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -17,47 +28,152 @@ class OrgUpdate(BaseModel):
     name: str | None = None
     created_by_user_id: int | None = None
 
+# Bulk request bodies: at most BULK_LIMIT items per request, applied in one transaction
+BULK_LIMIT = 1000
+
+class BulkUserIds(BaseModel):
+    user_ids: list[int] = Field(..., min_length=1, max_length=BULK_LIMIT)
+
+class BulkUserUpdate(BulkUserIds):
+    is_admin: bool
+
+class BulkMember(BaseModel):
+    user_id: int
+    roles: list[str] = []
+
+class BulkMembersAdd(BaseModel):
+    members: list[BulkMember] = Field(..., min_length=1, max_length=BULK_LIMIT)
+
+class BulkMembersRoles(BulkUserIds):
+    roles: list[str]
+
+def _bulk_results(user_ids: list[int], statuses: dict[int, str]) -> dict:
+    """Per-item results in request order (repeated ids are reported once, then as duplicates) plus totals."""
+    results, seen = [], set()
+    for user_id in user_ids:
+        status = "duplicate" if user_id in seen else statuses[user_id]
+        seen.add(user_id)
+        results.append({"user_id": user_id, "status": status})
+    summary: dict[str, int] = {}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+    return {"results": results, "summary": summary}
+
 # User Management Endpoints
 
+USER_SORT_COLUMNS = {
+    "created_at": User.created_at,
+    "email": User.email,
+    "username": User.username,
+    "id": User.id,
+}
+
+async def _linked_providers(db: AsyncSession, user_ids: list[int]) -> dict[int, list[dict]]:
+    # One batched query for the whole page instead of a lazy load per user
+    providers: dict[int, list[dict]] = {uid: [] for uid in user_ids}
+    if user_ids:
+        rows = (await db.execute(
+            select(LinkedAccount.user_id, LinkedAccount.provider)
+            .filter(LinkedAccount.user_id.in_(user_ids))
+            .order_by(LinkedAccount.id)
+        )).all()
+        for user_id, provider in rows:
+            providers[user_id].append({"provider": provider})
+    return providers
+
+def _user_row(u: User, linked_accounts: list[dict]) -> dict:
+    return {
+        "id": u.id,
+        "email": u.email,
+        "username": u.username,
+        "created_at": u.created_at,
+        "phone_number": u.phone_number,
+        "language": u.language,
+        "is_admin": u.is_admin,
+        "linked_accounts": linked_accounts,
+    }
+
 @router.get("/users")
-def get_users(db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    users = db.query(User).all()
-    # For each user, include linked_accounts as a list of {provider}
-    result = []
-    for u in users:
-        result.append({
-            "id": u.id,
-            "email": u.email,
-            "username": u.username,
-            "created_at": u.created_at.isoformat() if u.created_at else None,
-            "phone_number": u.phone_number,
-            "language": u.language,
-            "is_admin": u.is_admin,
-            "linked_accounts": [{"provider": a.provider} for a in getattr(u, "linked_accounts", [])],
-        })
-    return result
+async def get_users(
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(admin_required),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    sort: Literal["created_at", "email", "username", "id"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    email_prefix: str | None = None,
+    username_prefix: str | None = None,
+    is_admin: bool | None = None,
+    auth_provider: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+):
+    q = select(User)
+    if email_prefix:
+        q = q.filter(User.email.startswith(email_prefix, autoescape=True))
+    if username_prefix:
+        q = q.filter(User.username.startswith(username_prefix, autoescape=True))
+    if is_admin is not None:
+        q = q.filter(User.is_admin == is_admin)
+    if auth_provider:
+        q = q.filter(User.auth_provider == auth_provider)
+    if created_after:
+        q = q.filter(User.created_at >= created_after)
+    if created_before:
+        q = q.filter(User.created_at < created_before)
+
+    sort_col = USER_SORT_COLUMNS[sort]
+    if cursor:
+        cursor_sort, last_value, last_id = decode_cursor(cursor, str, sort_col.type.python_type, int)
+        if cursor_sort != f"{sort}:{order}":
+            raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+        key = tuple_(sort_col, User.id)
+        q = q.filter(key < (last_value, last_id) if order == "desc" else key > (last_value, last_id))
+    if order == "desc":
+        q = q.order_by(sort_col.desc(), User.id.desc())
+    else:
+        q = q.order_by(sort_col.asc(), User.id.asc())
 
+    # Fetch one extra row to know whether another page exists
+    users = (await db.scalars(q.limit(limit + 1))).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        last = users[-1]
+        next_cursor = encode_cursor(f"{sort}:{order}", getattr(last, sort_col.key), last.id)
+
+    providers = await _linked_providers(db, [u.id for u in users])
+    return ORJSONResponse({
+        "items": [_user_row(u, providers[u.id]) for u in users],
+        "next_cursor": next_cursor,
+    })
+
+
+# Ranked fuzzy search over username, email and full name (declared before /users/{user_id})
+@router.get("/users/search")
+async def search_users(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(admin_required),
+):
+    rows = (await db.execute(user_search(q, limit))).all()
+    providers = await _linked_providers(db, [u.id for u, _ in rows])
+    return ORJSONResponse({
+        "items": [{**_user_row(u, providers[u.id]), "full_name": u.full_name, "score": round(score, 3)} for u, score in rows],
+    })
 
 @router.get("/users/{user_id}")
-def get_user_detail(user_id: int, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    user = db.query(User).filter_by(id=user_id).first()
+async def get_user_detail(user_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "created_at": user.created_at.isoformat() if user.created_at else None,
-        "phone_number": user.phone_number,
-        "language": user.language,
-        "is_admin": user.is_admin,
-        "linked_accounts": [{"provider": a.provider} for a in getattr(user, "linked_accounts", [])],
-    }
+    return _user_row(user, (await _linked_providers(db, [user.id]))[user.id])
 
 
 @router.put("/users/{user_id}")
-def update_user(user_id: int, payload: dict = Body(...), db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    user = db.query(User).filter_by(id=user_id).first()
+async def update_user(user_id: int, payload: dict = Body(...), db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     for field in ["is_admin", "phone_number", "language"]:
@@ -65,129 +181,231 @@ def update_user(user_id: int, payload: dict = Body(...), db: Session = Depends(g
             setattr(user, field, payload[field])
     if payload.get("reset_password"):
         user.password_hash = None
-    db.commit()
-    db.refresh(user)
-    return {"success": True, "user": {
-        "id": user.id,
-        "email": user.email,
-        "username": user.username,
-        "created_at": user.created_at.isoformat() if user.created_at else None,
-        "phone_number": user.phone_number,
-        "language": user.language,
-        "is_admin": user.is_admin,
-        "linked_accounts": [{"provider": a.provider} for a in getattr(user, "linked_accounts", [])],
-    }}
+    # Member lists show these fields
+    await bump_versions(db, org_ids=member_organizations(user_id))
+    await db.commit()
+    user_cache.invalidate(user_id)
+    await db.refresh(user)
+    return {"success": True, "user": _user_row(user, (await _linked_providers(db, [user.id]))[user.id])}
 
 
 @router.delete("/users/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    user = db.query(User).filter_by(id=user_id).first()
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    db.delete(user)
-    db.commit()
+    await bump_versions(db, org_ids=member_organizations(user_id))
+    await db.delete(user)
+    await db.commit()
+    user_cache.invalidate(user_id)
+    membership_cache.invalidate_matching(lambda key: key[0] == user_id)
     return {"success": True}
 
+@router.post("/users/bulk-update")
+async def bulk_update_users(payload: BulkUserUpdate, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    await bump_versions(db, org_ids=member_organizations(*payload.user_ids))
+    updated = set((await db.scalars(
+        update(User).where(User.id.in_(payload.user_ids)).values(is_admin=payload.is_admin).returning(User.id)
+    )).all())
+    await db.commit()
+    user_cache.invalidate(*updated)
+    return _bulk_results(payload.user_ids, {uid: "updated" if uid in updated else "not_found" for uid in payload.user_ids})
+
+
+@router.post("/users/bulk-delete")
+async def bulk_delete_users(payload: BulkUserIds, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    ids = set(payload.user_ids)
+    users = (await db.execute(select(User.id, User.email).where(User.id.in_(ids)))).all()
+    # Organizations keep a reference to their creator, so those users have to be handled one by one
+    owners = set((await db.scalars(select(Organization.created_by_user_id).where(Organization.created_by_user_id.in_(ids)).distinct())).all())
+    doomed = [u.id for u in users if u.id not in owners]
+    emails = [u.email for u in users if u.id not in owners]
+    if doomed:
+        await bump_versions(db, org_ids=member_organizations(*doomed))
+        # The same rows the ORM cascade removes for a single delete, one statement per table
+        await db.execute(delete(OrganizationMember).where(OrganizationMember.user_id.in_(doomed)))
+        await db.execute(delete(OrganizationInvite).where(OrganizationInvite.target_user_id.in_(doomed)))
+        await db.execute(delete(LinkedAccount).where(LinkedAccount.user_id.in_(doomed)))
+        await db.execute(delete(VerificationCode).where(VerificationCode.email.in_(emails)))
+        await db.execute(delete(PasswordReset).where(PasswordReset.email.in_(emails)))
+        await db.execute(delete(User).where(User.id.in_(doomed)))
+    await db.commit()
+    deleted = set(doomed)
+    user_cache.invalidate(*deleted)
+    membership_cache.invalidate_matching(lambda key: key[0] in deleted)
+    found = {u.id for u in users}
+    return _bulk_results(payload.user_ids, {
+        uid: "deleted" if uid in deleted else "owns_organizations" if uid in found else "not_found"
+        for uid in payload.user_ids
+    })
+
 # Organization Management Endpoints
 
+def _member_count_column():
+    # Correlated count, one ix_organization_members_org_id range scan per organization. Sorted by
+    # created_at or name, only the page's rows are counted; sort=member_count (and its cursor filter)
+    # has to count every organization matching the name filter before it can order them
+    return select(func.count(OrganizationMember.id))\
+        .where(OrganizationMember.organization_id == Organization.id)\
+        .correlate(Organization)\
+        .scalar_subquery()
+
+def _org_row(o: Organization, member_count: int) -> dict:
+    return {
+        "id": o.id,
+        "name": o.name,
+        "created_by_user_id": o.created_by_user_id,
+        "created_at": o.created_at,
+        "member_count": int(member_count),
+    }
+
 @router.get("/organizations")
-def get_organizations(db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    orgs = db.query(Organization).all()
-    result = []
-    for o in orgs:
-        # Count members if relationship exists, else 0
-        member_count = len(getattr(o, "members", [])) if hasattr(o, "members") else 0
-        result.append({
-            "id": o.id,
-            "name": o.name,
-            "created_by_user_id": o.created_by_user_id,
-            "created_at": o.created_at.isoformat() if o.created_at else None,
-            "member_count": member_count,
-        })
-    return result
+async def get_organizations(
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(admin_required),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    sort: Literal["created_at", "member_count", "name"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
+    name: str | None = Query(None, description="Case-insensitive substring of the organization name"),
+):
+    member_count = _member_count_column()
+    sort_col = {
+        "created_at": Organization.created_at,
+        "member_count": member_count,
+        "name": Organization.name,
+    }[sort]
+    q = select(Organization, member_count.label("member_count"))
+    if name:
+        # ILIKE (not lower() LIKE) so ix_organizations_name_trgm applies
+        q = q.filter(Organization.name.ilike(contains_pattern(name), escape=LIKE_ESCAPE))
+    if cursor:
+        cursor_sort, last_value, last_id = decode_cursor(cursor, str, sort_col.type.python_type, int)
+        if cursor_sort != f"{sort}:{order}":
+            raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+        key = tuple_(sort_col, Organization.id)
+        q = q.filter(key < (last_value, last_id) if order == "desc" else key > (last_value, last_id))
+    if order == "desc":
+        q = q.order_by(sort_col.desc(), Organization.id.desc())
+    else:
+        q = q.order_by(sort_col.asc(), Organization.id.asc())
+
+    rows = (await db.execute(q.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_org, last_count = rows[-1]
+        last_value = last_count if sort == "member_count" else getattr(last_org, sort)
+        next_cursor = encode_cursor(f"{sort}:{order}", last_value, last_org.id)
+    return ORJSONResponse({
+        "items": [_org_row(o, count) for o, count in rows],
+        "next_cursor": next_cursor,
+    })
 
 
 @router.get("/organizations/{org_id}")
-def get_org_detail(org_id: int, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    org = db.query(Organization).filter_by(id=org_id).first()
-    if not org:
+async def get_org_detail(
+    org_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(admin_required),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="members_next_cursor from the previous page"),
+    role: str | None = None,
+    username: str | None = Query(None, description="Username prefix"),
+):
+    row = (await db.execute(
+        select(Organization, _member_count_column().label("member_count")).filter(Organization.id == org_id)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Organization not found")
-    members = []
-    for m in getattr(org, "members", []):
-        user = db.query(User).filter_by(id=m.user_id).first()
-        members.append({
+    org, member_count = row
+
+    # Members and their user summaries in a single joined query
+    q = select(OrganizationMember.id, OrganizationMember.user_id, OrganizationMember.roles, User.username, User.email)\
+        .join(User, User.id == OrganizationMember.user_id)\
+        .filter(OrganizationMember.organization_id == org_id)
+    if role:
+        q = q.filter(OrganizationMember.roles.contains([role]))
+    if username:
+        q = q.filter(User.username.startswith(username, autoescape=True))
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        q = q.filter(OrganizationMember.id > last_id)
+    rows = (await db.execute(q.order_by(OrganizationMember.id).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+
+    return ORJSONResponse({
+        **_org_row(org, member_count),
+        "members": [{
             "id": m.id,
             "user_id": m.user_id,
             "roles": m.roles or [],
             "user": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-            } if user else None,
-        })
-    return {
-        "id": org.id,
-        "name": org.name,
-        "created_by_user_id": org.created_by_user_id,
-        "created_at": org.created_at.isoformat() if org.created_at else None,
-        "member_count": len(members),
-        "members": members,
-    }
+                "id": m.user_id,
+                "username": m.username,
+                "email": m.email,
+            },
+        } for m in rows],
+        "members_next_cursor": next_cursor,
+    })
 
 
 @router.post("/organizations")
-def create_organization(db: Session = Depends(get_db), current_user=Depends(admin_required)):
+async def create_organization(db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
     # TODO: Implement org creation
     pass
 
 
 @router.put("/organizations/{org_id}")
-def update_organization(org_id: int, payload: OrgUpdate, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    org = db.query(Organization).filter_by(id=org_id).first()
+async def update_organization(org_id: int, payload: OrgUpdate, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    org = await db.get(Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
     if payload.name:
         org.name = payload.name
     if payload.created_by_user_id:
         org.created_by_user_id = payload.created_by_user_id
-    db.commit()
-    db.refresh(org)
-    return {"success": True, "org": {
-        "id": org.id,
-        "name": org.name,
-        "created_by_user_id": org.created_by_user_id,
-        "created_at": org.created_at.isoformat() if org.created_at else None,
-        "member_count": len(getattr(org, "members", [])) if hasattr(org, "members") else 0,
-    }}
+    # Both show up in the members' and invitees' dashboards
+    await bump_versions(db, user_ids=org_audience(org_id), org_ids=[org_id])
+    await db.commit()
+    await db.refresh(org)
+    member_count = await db.scalar(select(func.count(OrganizationMember.id)).filter(OrganizationMember.organization_id == org.id))
+    return {"success": True, "org": _org_row(org, member_count)}
 
 
 @router.delete("/organizations/{org_id}")
-def delete_organization(org_id: int, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    org = db.query(Organization).filter_by(id=org_id).first()
+async def delete_organization(org_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    org = await db.get(Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    db.delete(org)
-    db.commit()
+    await bump_versions(db, user_ids=org_audience(org_id), org_ids=[org_id])
+    await db.delete(org)
+    await db.commit()
+    membership_cache.invalidate_matching(lambda key: key[1] == org_id)
     return {"success": True}
 
 
 @router.post("/organizations/{org_id}/members")
-def add_org_member(org_id: int, payload: dict = Body(...), db: Session = Depends(get_db), current_user=Depends(admin_required)):
+async def add_org_member(org_id: int, payload: dict = Body(...), db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
     user_id = payload.get("user_id")
     roles = payload.get("roles", [])
     if not user_id:
         raise HTTPException(status_code=400, detail="user_id required")
-    org = db.query(Organization).filter_by(id=org_id).first()
+    org = await db.get(Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    from models import OrganizationMember
-    existing = db.query(OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).first()
+    existing = await db.scalar(select(OrganizationMember).filter_by(organization_id=org_id, user_id=user_id))
     if existing:
         raise HTTPException(status_code=400, detail="User already a member")
     member = OrganizationMember(user_id=user_id, organization_id=org_id, roles=roles)
     db.add(member)
-    db.commit()
-    db.refresh(member)
+    await bump_versions(db, user_ids=[user_id], org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate((user_id, org_id))
+    await db.refresh(member)
     return {"success": True, "member": {
         "id": member.id,
         "user_id": member.user_id,
@@ -196,48 +414,126 @@ def add_org_member(org_id: int, payload: dict = Body(...), db: Session = Depends
 
 
 @router.delete("/organizations/{org_id}/members/{user_id}")
-def remove_org_member(org_id: int, user_id: int, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    from models import OrganizationMember
-    member = db.query(OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).first()
+async def remove_org_member(org_id: int, user_id: int, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    member = await db.scalar(select(OrganizationMember).filter_by(organization_id=org_id, user_id=user_id))
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    await bump_versions(db, user_ids=[user_id], org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate((user_id, org_id))
     return {"success": True}
 
+async def _require_org(db: AsyncSession, org_id: int):
+    if not await db.scalar(select(Organization.id).filter_by(id=org_id)):
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+
+@router.post("/organizations/{org_id}/members/bulk-add")
+async def bulk_add_org_members(org_id: int, payload: BulkMembersAdd, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    await _require_org(db, org_id)
+    requested = {}
+    for m in payload.members:
+        requested.setdefault(m.user_id, m.roles)
+    existing_users = set((await db.scalars(select(User.id).where(User.id.in_(requested)))).all())
+    added = set()
+    if existing_users:
+        added = set((await db.scalars(
+            insert(OrganizationMember)
+            .values([{"user_id": uid, "organization_id": org_id, "roles": requested[uid]} for uid in existing_users])
+            .on_conflict_do_nothing(constraint="uq_user_org")
+            .returning(OrganizationMember.user_id)
+        )).all())
+    if added:
+        await bump_versions(db, user_ids=added, org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate(*((uid, org_id) for uid in added))
+    user_ids = [m.user_id for m in payload.members]
+    return _bulk_results(user_ids, {
+        uid: "added" if uid in added else "already_member" if uid in existing_users else "user_not_found"
+        for uid in user_ids
+    })
+
+
+@router.post("/organizations/{org_id}/members/bulk-remove")
+async def bulk_remove_org_members(org_id: int, payload: BulkUserIds, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    await _require_org(db, org_id)
+    removed = set((await db.scalars(
+        delete(OrganizationMember)
+        .where(OrganizationMember.organization_id == org_id, OrganizationMember.user_id.in_(payload.user_ids))
+        .returning(OrganizationMember.user_id)
+    )).all())
+    if removed:
+        await bump_versions(db, user_ids=removed, org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate(*((uid, org_id) for uid in removed))
+    return _bulk_results(payload.user_ids, {uid: "removed" if uid in removed else "not_member" for uid in payload.user_ids})
+
+
+@router.post("/organizations/{org_id}/members/bulk-roles")
+async def bulk_set_member_roles(org_id: int, payload: BulkMembersRoles, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    await _require_org(db, org_id)
+    updated = set((await db.scalars(
+        update(OrganizationMember)
+        .where(OrganizationMember.organization_id == org_id, OrganizationMember.user_id.in_(payload.user_ids))
+        .values(roles=payload.roles)
+        .returning(OrganizationMember.user_id)
+    )).all())
+    if updated:
+        await bump_versions(db, user_ids=updated, org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate(*((uid, org_id) for uid in updated))
+    return _bulk_results(payload.user_ids, {uid: "updated" if uid in updated else "not_member" for uid in payload.user_ids})
+
+# Totals for the dashboard overview (the list endpoints are paginated)
+@router.get("/stats/counts")
+async def counts(db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    return {
+        "users": await db.scalar(select(func.count(User.id))),
+        "organizations": await db.scalar(select(func.count(Organization.id))),
+    }
+
+# Live connection pool statistics for this worker process
+@router.get("/stats/pool")
+async def pool_statistics(current_user=Depends(admin_required)):
+    return pool_stats.snapshot(async_engine.pool)
+
+# Outgoing mail throughput and latency, as last reported by each job worker (the API sends no mail)
+@router.get("/stats/mail")
+async def mail_statistics(db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    return {"workers": await worker_stats.section(db, "mail")}
+
+# Expired-row sweeps, as last reported by each job worker. lag_seconds is the time since the last
+# sweep, which should stay under the sweep interval.
+@router.get("/stats/janitor")
+async def janitor_statistics(db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    workers = await worker_stats.section(db, "janitor")
+    now = datetime.now(timezone.utc)
+    for w in workers:
+        last_run_at = w["last_run_at"] and datetime.fromisoformat(w["last_run_at"])
+        w["lag_seconds"] = round((now - last_run_at).total_seconds(), 3) if last_run_at else None
+    return {"workers": workers}
+
 # Top organizations by member count
 @router.get("/stats/top-orgs")
-def top_organizations(limit: int = 5, db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    from models import OrganizationMember
-    q = db.query(Organization, func.count(OrganizationMember.id).label("member_count"))\
+async def top_organizations(limit: int = 5, db: AsyncSession = Depends(get_async_db), current_user=Depends(admin_required)):
+    q = select(Organization, func.count(OrganizationMember.id).label("member_count"))\
         .join(OrganizationMember, Organization.id == OrganizationMember.organization_id)\
         .group_by(Organization.id)\
         .order_by(func.count(OrganizationMember.id).desc())\
         .limit(limit)
-    results = q.all()
+    results = (await db.execute(q)).all()
     return [{
         "id": org.id,
         "name": org.name,
         "member_count": int(member_count)
     } for org, member_count in results]
 
-# Email templates preview (reads raw template files)
+# Email templates preview, served from the shared template cache
 @router.get("/email-templates")
-def email_templates(db: Session = Depends(get_db), current_user=Depends(admin_required)):
-    templates_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
-    # fallback to project root templates
-    if not os.path.isdir(templates_dir):
-        templates_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "templates")
-    result = {}
-    try:
-        files = [f for f in os.listdir(templates_dir) if f.endswith('.jinja2')]
-    except Exception:
-        files = []
-    for fname in files:
-        path = os.path.join(templates_dir, fname)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                result[fname] = f.read()
-        except Exception:
-            result[fname] = "(not available)"
-    return result
+async def get_email_templates(request: Request, current_user=Depends(admin_required)):
+    # The cache may need to stat/re-read files, so keep it off the event loop
+    etag, sources = await run_in_threadpool(email_templates.sources)
+    if cached := not_modified(request, etag):
+        return cached
+    return ORJSONResponse(sources, headers=etag_headers(etag))
@@ -1,37 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List
-from sqlalchemy import not_
-import random, string
+from sqlalchemy import delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+import secrets, string
 from datetime import datetime, timezone
 
-from helpers import auth
+from helpers import auth, jobs
+from helpers.cache import membership_cache
+from helpers.etags import bump_versions, etag_headers, make_etag, not_modified, user_version
+from helpers.pagination import encode_cursor, decode_cursor
+from helpers.search import LIKE_ESCAPE, contains_pattern, user_search
+from helpers.serializers import model_response
 
-def get_current_user_id(user=Depends(auth.get_current_user)):
+async def get_current_user_id(user=Depends(auth.get_current_user)):
     return user.id
-from database import get_db
+from database import get_async_db
 import models, schemas
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
 # --- Dependencies for role-based access ---
-def require_org_member(org_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
-    membership = db.query(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).first()
+async def get_membership(db: AsyncSession, org_id: int, user_id: int):
+    cached = membership_cache.get((user_id, org_id))
+    if cached is not None:
+        return await db.merge(cached, load=False)
+    membership = await db.scalar(select(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id))
+    if membership:
+        membership_cache.put((user_id, org_id), membership)
+    return membership
+
+async def require_org_member(org_id: int, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    membership = await get_membership(db, org_id, user_id)
     if not membership:
         raise HTTPException(status_code=403, detail="Not a member of this organization")
     return membership
 
-def require_org_admin(org_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
-    membership = db.query(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).first()
+async def require_org_admin(org_id: int, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    membership = await get_membership(db, org_id, user_id)
     if not membership or ("admin" not in membership.roles):
         raise HTTPException(status_code=403, detail="Not an admin of this organization")
     return membership
 
 # --- Organization Routes ---
 @router.post("/", response_model=schemas.OrganizationOut)
-def create_organization(payload: schemas.OrganizationCreate, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+async def create_organization(payload: schemas.OrganizationCreate, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
     # Check for duplicate organization name
-    existing_org = db.query(models.Organization).filter_by(name=payload.name).first()
+    existing_org = await db.scalar(select(models.Organization).filter_by(name=payload.name))
     if existing_org:
         raise HTTPException(status_code=400, detail="Organization with this name already exists")
     org = models.Organization(
@@ -39,206 +56,355 @@ def create_organization(payload: schemas.OrganizationCreate, db: Session = Depen
         created_by_user_id=user_id
     )
     db.add(org)
-    db.commit()
-    db.refresh(org)
+    await db.commit()
+    await db.refresh(org)
     # Add creator as admin member
     member = models.OrganizationMember(user_id=user_id, organization_id=org.id, roles=["admin"])
     db.add(member)
-    db.commit()
+    await bump_versions(db, user_ids=[user_id])
+    await db.commit()
     return org
 
 @router.get("/me", response_model=List[schemas.OrganizationWithRole])
-def list_my_organizations(db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
-    memberships = db.query(models.OrganizationMember).filter_by(user_id=user_id).all()
-    org_ids = [m.organization_id for m in memberships]
-    orgs = db.query(models.Organization).filter(models.Organization.id.in_(org_ids)).all()
-    orgs_by_id = {org.id: org for org in orgs}
-    result = []
-    for m in memberships:
-        org = orgs_by_id.get(m.organization_id)
-        if org:
-            result.append(schemas.OrganizationWithRole(
-                **schemas.OrganizationOut.model_validate(org).model_dump(),
-                user_roles=m.roles
-            ))
-    return result
+async def list_my_organizations(request: Request, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    etag = make_etag(request, user_id, await user_version(db, user_id))
+    if cached := not_modified(request, etag):
+        return cached
+    rows = (await db.execute(
+        select(models.Organization.id, models.Organization.name, models.Organization.created_by_user_id,
+               models.Organization.created_at, models.OrganizationMember.roles.label("user_roles"))
+        .join(models.OrganizationMember, models.OrganizationMember.organization_id == models.Organization.id)
+        .filter(models.OrganizationMember.user_id == user_id)
+        .order_by(models.OrganizationMember.id)
+    )).all()
+    return model_response(List[schemas.OrganizationWithRole], rows, headers=etag_headers(etag))
 
 @router.get("/{org_id}", response_model=schemas.OrganizationWithMembers)
-def get_organization(org_id: int, db: Session = Depends(get_db), _=Depends(require_org_member), user_id: int = Depends(get_current_user_id)):
-    org = db.query(models.Organization).filter_by(id=org_id).first()
+async def get_organization(request: Request, org_id: int, db: AsyncSession = Depends(get_async_db), membership=Depends(require_org_member)):
+    org = await db.get(models.Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    members = db.query(models.OrganizationMember).filter_by(organization_id=org_id).all()
-    # Find current user's roles
-    user_roles = []
-    for m in members:
-        if m.user_id == user_id:
-            user_roles = m.roles
-            break
-    return schemas.OrganizationWithMembers(
-        **schemas.OrganizationOut.model_validate(org).model_dump(),
-        members=[schemas.OrganizationMemberOut.model_validate(m) for m in members],
-        current_user_roles=user_roles
-    )
+    # current_user_roles differ per member, so the ETag is per user too
+    etag = make_etag(request, membership.user_id, org.version)
+    if cached := not_modified(request, etag):
+        return cached
+    # OrganizationMemberOut includes the user, so load it with the members
+    members = (await db.scalars(
+        select(models.OrganizationMember)
+        .options(joinedload(models.OrganizationMember.user))
+        .filter_by(organization_id=org_id)
+    )).all()
+    return model_response(schemas.OrganizationWithMembers, {
+        "id": org.id,
+        "name": org.name,
+        "created_by_user_id": org.created_by_user_id,
+        "created_at": org.created_at,
+        "members": members,
+        "current_user_roles": membership.roles,
+    }, headers=etag_headers(etag))
 
-@router.get("/", response_model=List[schemas.OrganizationOut])
-def list_organizations(
-    db: Session = Depends(get_db),
+@router.get("/", response_model=schemas.OrganizationPage)
+async def list_organizations(
+    db: AsyncSession = Depends(get_async_db),
     user_id: int = Depends(get_current_user_id),
-    include_mine: bool = Query(True, description="Include organizations you are already a member of")
+    include_mine: bool = Query(True, description="Include organizations you are already a member of"),
+    q: str | None = Query(None, description="Case-insensitive search within organization names"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
 ):
-    memberships = db.query(models.OrganizationMember).filter_by(user_id=user_id).all()
-    joined_org_ids = {m.organization_id for m in memberships}
-    if include_mine:
-        orgs = db.query(models.Organization).all()
-    else:
-        orgs = db.query(models.Organization).filter(not_(models.Organization.id.in_(joined_org_ids))).all()
-    return [schemas.OrganizationOut.model_validate(org) for org in orgs]
+    query = select(models.Organization)
+    if not include_mine:
+        # NOT EXISTS plans as an anti-join on uq_user_org, however many orgs the user is in
+        query = query.filter(~select(models.OrganizationMember.id).where(
+            models.OrganizationMember.user_id == user_id,
+            models.OrganizationMember.organization_id == models.Organization.id,
+        ).exists())
+    if q:
+        query = query.filter(models.Organization.name.ilike(contains_pattern(q), escape=LIKE_ESCAPE))
+    if cursor:
+        last_name, last_id = decode_cursor(cursor, str, int)
+        query = query.filter(tuple_(models.Organization.name, models.Organization.id) > (last_name, last_id))
+    orgs = (await db.scalars(query.order_by(models.Organization.name, models.Organization.id).limit(limit + 1))).all()
+    next_cursor = None
+    if len(orgs) > limit:
+        orgs = orgs[:limit]
+        next_cursor = encode_cursor(orgs[-1].name, orgs[-1].id)
+    return model_response(schemas.OrganizationPage, {"items": orgs, "next_cursor": next_cursor})
 
 # --- Membership Routes ---
 @router.post("/{org_id}/join")
-def join_organization(org_id: int, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
-    org = db.query(models.Organization).filter_by(id=org_id).first()
+async def join_organization(org_id: int, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    org = await db.get(models.Organization, org_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
-    existing = db.query(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).first()
+    existing = await db.scalar(select(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id))
     if existing:
         raise HTTPException(status_code=400, detail="Already a member")
     member = models.OrganizationMember(user_id=user_id, organization_id=org_id, roles=["member"])
     db.add(member)
-    db.commit()
+    await bump_versions(db, user_ids=[user_id], org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate((user_id, org_id))
     return {"detail": "Joined organization"}
 
 @router.get("/{org_id}/members", response_model=List[schemas.OrganizationMemberOut])
-def list_members(org_id: int, db: Session = Depends(get_db), _=Depends(require_org_member)):
-    members = (
-        db.query(models.OrganizationMember)
+async def list_members(org_id: int, db: AsyncSession = Depends(get_async_db), _=Depends(require_org_member)):
+    members = (await db.scalars(
+        select(models.OrganizationMember)
+        .options(joinedload(models.OrganizationMember.user))
         .filter_by(organization_id=org_id)
         .order_by(models.OrganizationMember.created_at)
-        .all()
-    )
-    return [schemas.OrganizationMemberOut.model_validate(m) for m in members]
+    )).all()
+    return model_response(List[schemas.OrganizationMemberOut], members)
 
 @router.patch("/{org_id}/members/{user_id}")
-def update_member_roles(org_id: int, user_id: int, payload: schemas.OrganizationMemberBase, db: Session = Depends(get_db), admin=Depends(require_org_admin)):
-    member = db.query(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).first()
+async def update_member_roles(org_id: int, user_id: int, payload: schemas.OrganizationMemberBase, db: AsyncSession = Depends(get_async_db), admin=Depends(require_org_admin)):
+    member = await db.scalar(select(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id))
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
     member.roles = payload.roles
-    db.commit()
+    await bump_versions(db, user_ids=[user_id], org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate((user_id, org_id))
     return {"detail": "Roles updated"}
 
 @router.delete("/{org_id}/members/{user_id}")
-def remove_member(org_id: int, user_id: int, db: Session = Depends(get_db), _=Depends(require_org_admin)):
-    member = db.query(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).first()
+async def remove_member(org_id: int, user_id: int, db: AsyncSession = Depends(get_async_db), _=Depends(require_org_admin)):
+    member = await db.scalar(select(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id))
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
-    db.query(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id).delete()
-    db.commit()
+    await db.execute(delete(models.OrganizationMember).filter_by(organization_id=org_id, user_id=user_id))
+    await bump_versions(db, user_ids=[user_id], org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate((user_id, org_id))
     return {"detail": "Member removed"}
 
 @router.post("/{org_id}/leave")
-def leave_organization(org_id: int, db: Session = Depends(get_db), membership=Depends(require_org_member)):
+async def leave_organization(org_id: int, db: AsyncSession = Depends(get_async_db), membership=Depends(require_org_member)):
     if "admin" in membership.roles:
         raise HTTPException(status_code=403, detail="Admins cannot leave the organization without transferring authority")
-    db.delete(membership)
-    db.commit()
+    await db.delete(membership)
+    await bump_versions(db, user_ids=[membership.user_id], org_ids=[org_id])
+    await db.commit()
+    membership_cache.invalidate((membership.user_id, org_id))
     return {"detail": "Left organization"}
 
+@router.get("/{org_id}/invite-candidates", response_model=List[schemas.UserSearchResult])
+async def search_invite_candidates(
+    org_id: int,
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    _=Depends(require_org_admin),
+):
+    # Autocomplete for the invite dialog: best matches that aren't members yet
+    query = user_search(q, limit).where(~select(models.OrganizationMember.id).where(
+        models.OrganizationMember.organization_id == org_id,
+        models.OrganizationMember.user_id == models.User.id,
+    ).exists())
+    users = (await db.scalars(query)).all()
+    return model_response(List[schemas.UserSearchResult], users)
+
 # --- Invite Routes ---
-def generate_invite_code(org_id: int, length: int = 6) -> str:
-    code = ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
+INVITE_CODE_ALPHABET = string.ascii_lowercase + string.digits
+
+def generate_invite_code(org_id: int, length: int = 12) -> str:
+    # 36**12 (~62 bits) per organization, so a collision is practically impossible however many invites exist
+    code = ''.join(secrets.choice(INVITE_CODE_ALPHABET) for _ in range(length))
     return f"{org_id}-{code}"
 
+async def insert_invites(db: AsyncSession, org_id: int, rows: list[dict]) -> list[models.OrganizationInvite]:
+    """
+    Insert one invite per row (target_user_id, max_uses, expires_at) with a fresh code each, in a
+    single INSERT that leans on the unique index: a row whose code is taken is skipped by
+    ON CONFLICT and retried with a new code. Returns the invites in the order of `rows`.
+    """
+    invites: list[models.OrganizationInvite | None] = [None] * len(rows)
+    pending = list(range(len(rows)))
+    for _ in range(5):
+        if not pending:
+            break
+        codes = {generate_invite_code(org_id): i for i in pending}
+        inserted = (await db.scalars(
+            insert(models.OrganizationInvite)
+            .values([{**rows[i], "org_id": org_id, "code": code} for code, i in codes.items()])
+            .on_conflict_do_nothing(index_elements=["code"])
+            .returning(models.OrganizationInvite)
+        )).all()
+        for invite in inserted:
+            invites[codes[invite.code]] = invite
+        pending = [i for i in pending if invites[i] is None]
+    if pending:
+        raise HTTPException(status_code=500, detail="Failed to generate unique invite code")
+    return invites
+
 @router.get("/me/invites", response_model=List[schemas.OrganizationInviteOut])
-def list_user_invites(db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+async def list_user_invites(request: Request, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    etag = make_etag(request, user_id, await user_version(db, user_id))
+    if cached := not_modified(request, etag):
+        return cached
     # Only invites targeted to this user
-    invites = db.query(models.OrganizationInvite).filter(
+    invites = (await db.scalars(select(models.OrganizationInvite).options(
+        joinedload(models.OrganizationInvite.organization)
+    ).filter(
         models.OrganizationInvite.target_user_id == user_id
-    ).all()
-    return [schemas.OrganizationInviteOut.model_validate(i) for i in invites]
+    ))).all()
+    return model_response(List[schemas.OrganizationInviteOut], invites, headers=etag_headers(etag))
 
 # --- Organization Invite Routes (must come after /me/invites) ---
 @router.get("/{org_id}/invites", response_model=List[schemas.OrganizationInviteOut])
-def list_org_invites(org_id: int, db: Session = Depends(get_db), admin=Depends(require_org_admin)):
-    invites = db.query(models.OrganizationInvite).filter_by(org_id=org_id).all()
-    return [schemas.OrganizationInviteOut.model_validate(i) for i in invites]
+async def list_org_invites(org_id: int, db: AsyncSession = Depends(get_async_db), admin=Depends(require_org_admin)):
+    invites = (await db.scalars(select(models.OrganizationInvite).options(
+        joinedload(models.OrganizationInvite.organization)
+    ).filter_by(org_id=org_id))).all()
+    return model_response(List[schemas.OrganizationInviteOut], invites)
 
 @router.post("/{org_id}/invites", response_model=schemas.OrganizationInviteOut)
-def create_invite(org_id: int, payload: schemas.OrganizationInviteCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), admin=Depends(require_org_admin)):
-    # Generate unique code
-    for _ in range(5):
-        code = generate_invite_code(org_id)
-        if not db.query(models.OrganizationInvite).filter_by(org_id=org_id, code=code).first():
-            break
-    else:
-        raise HTTPException(status_code=500, detail="Failed to generate unique invite code")
+async def create_invite(org_id: int, payload: schemas.OrganizationInviteCreate, db: AsyncSession = Depends(get_async_db), admin=Depends(require_org_admin)):
     target_user_id = None
+    user = None
     if payload.target_username:
-        user = db.query(models.User).filter_by(username=payload.target_username).first()
+        user = await db.scalar(select(models.User).filter_by(username=payload.target_username))
         if user:
             target_user_id = user.id
         else:
             raise HTTPException(status_code=404, detail="No user found with the given username")
-    
-    invite = models.OrganizationInvite(
-        org_id=org_id,
-        code=code,
-        target_user_id=target_user_id,
-        max_uses=payload.max_uses or 1,
-        expires_at=payload.expires_at
-    )
-    db.add(invite)
-    db.commit()
-    db.refresh(invite)
+
+    [invite] = await insert_invites(db, org_id, [{
+        "target_user_id": target_user_id,
+        "max_uses": payload.max_uses or 1,
+        "expires_at": payload.expires_at,
+    }])
+    org = await db.get(models.Organization, org_id)
+    # OrganizationInviteOut nests the organization, which can't be lazy-loaded under asyncio
+    set_committed_value(invite, "organization", org)
 
     # Send invite email if targeted
-    if target_user_id:
-        user = db.query(models.User).filter_by(id=target_user_id).first()
-        org = db.query(models.Organization).filter_by(id=org_id).first()
-        if user and org and background_tasks:
-            from helpers.emails import send_org_invite_email
-            email_info = schemas.EmailDetails(
-                recipients=[user.email],
+    if user:
+        email_info = schemas.EmailDetails(
+            recipients=[user.email],
+            body={
+                "user_name": user.username,
+                "org_name": org.name,
+                "invite_code": invite.code,
+            }
+        )
+        jobs.enqueue_email(db, "org_invite_email", email_info)
+    await bump_versions(db, user_ids=[target_user_id])
+    await db.commit()
+    return model_response(schemas.OrganizationInviteOut, invite)
+
+@router.post("/{org_id}/invites/bulk", response_model=List[schemas.OrganizationInviteBulkResult])
+async def create_invites_bulk(org_id: int, payload: schemas.OrganizationInviteBulkCreate, db: AsyncSession = Depends(get_async_db), admin=Depends(require_org_admin)):
+    targets = [t.strip() for t in payload.targets]
+    # Resolve every username/email, and whether it's already a member, in one query
+    rows = (await db.execute(
+        select(models.User.id, models.User.username, models.User.email, models.OrganizationMember.id.label("member_id"))
+        .outerjoin(models.OrganizationMember, (models.OrganizationMember.user_id == models.User.id) & (models.OrganizationMember.organization_id == org_id))
+        .where(or_(models.User.username.in_(targets), models.User.email.in_(targets)))
+    )).all()
+    by_target = {}
+    for row in rows:
+        by_target[row.email] = row
+        by_target.setdefault(row.username, row)
+
+    statuses, invitees, seen_users = [], {}, set()
+    for target in targets:
+        user = by_target.get(target)
+        if user is None:
+            statuses.append("not_found")
+        elif user.id in seen_users:
+            statuses.append("duplicate")
+        elif user.member_id is not None:
+            statuses.append("already_member")
+        else:
+            statuses.append("invited")
+            invitees[user.id] = user
+        if user is not None:
+            seen_users.add(user.id)
+
+    inserted = await insert_invites(db, org_id, [
+        {"target_user_id": user_id, "max_uses": payload.max_uses or 1, "expires_at": payload.expires_at}
+        for user_id in invitees
+    ])
+    invites = dict(zip(invitees, inserted))
+
+    org = await db.get(models.Organization, org_id)
+    for invite in invites.values():
+        # OrganizationInviteOut nests the organization; attach the one we have instead of lazy-loading it
+        set_committed_value(invite, "organization", org)
+    if invites:
+        jobs.enqueue_emails(db, "org_invite_email", [
+            schemas.EmailDetails(
+                recipients=[invitees[user_id].email],
                 body={
-                    "user_name": user.username,
+                    "user_name": invitees[user_id].username,
                     "org_name": org.name,
-                    "invite_code": code,
+                    "invite_code": invite.code,
                 }
             )
-            background_tasks.add_task(send_org_invite_email, email_info)
-    return schemas.OrganizationInviteOut.model_validate(invite)
+            for user_id, invite in invites.items()
+        ])
+    await bump_versions(db, user_ids=list(invites))
+    await db.commit()
+
+    return model_response(List[schemas.OrganizationInviteBulkResult], [
+        {"target": target, "status": status, "invite": invites[by_target[target].id] if status == "invited" else None}
+        for target, status in zip(targets, statuses)
+    ])
 
 @router.delete("/{org_id}/invites/{invite_id}")
-def revoke_invite(org_id: int, invite_id: int, db: Session = Depends(get_db), admin=Depends(require_org_admin)):
-    invite = db.query(models.OrganizationInvite).filter_by(id=invite_id, org_id=org_id).first()
+async def revoke_invite(org_id: int, invite_id: int, db: AsyncSession = Depends(get_async_db), admin=Depends(require_org_admin)):
+    invite = await db.scalar(select(models.OrganizationInvite).filter_by(id=invite_id, org_id=org_id))
     if not invite:
         raise HTTPException(status_code=404, detail="Invite not found")
-    db.delete(invite)
-    db.commit()
+    await db.delete(invite)
+    await bump_versions(db, user_ids=[invite.target_user_id])
+    await db.commit()
     return {"detail": "Invite revoked"}
 
 @router.post("/invites/accept")
-def accept_invite(payload: schemas.OrganizationInviteAccept, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+async def accept_invite(payload: schemas.OrganizationInviteAccept, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
     code = payload.code.strip()
-    invite = db.query(models.OrganizationInvite).filter_by(code=code).first()
-    if not invite:
-        raise HTTPException(status_code=404, detail="Invite not found")
-    if invite.expires_at and invite.expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=400, detail="Invite expired")
-    if invite.target_user_id and invite.target_user_id != user_id:
-        raise HTTPException(status_code=403, detail="This invite is not for you")
-    if invite.uses >= invite.max_uses:
+    Invite = models.OrganizationInvite
+    # Claim a use only if the invite is still valid for this user. The row lock taken by the UPDATE
+    # serializes concurrent accepts of the same code, so max_uses can't be overshot.
+    claimed = (await db.execute(
+        update(Invite)
+        .where(
+            Invite.code == code,
+            Invite.uses < Invite.max_uses,
+            or_(Invite.expires_at.is_(None), Invite.expires_at >= func.now()),
+            or_(Invite.target_user_id.is_(None), Invite.target_user_id == user_id),
+        )
+        .values(uses=Invite.uses + 1)
+        .returning(Invite.id, Invite.org_id, Invite.uses, Invite.max_uses)
+    )).first()
+    if not claimed:
+        await db.rollback()
+        # Only the failure path pays for finding out which check failed
+        invite = await db.scalar(select(Invite).filter_by(code=code))
+        if not invite:
+            raise HTTPException(status_code=404, detail="Invite not found")
+        if invite.expires_at and invite.expires_at < datetime.now(timezone.utc):
+            raise HTTPException(status_code=400, detail="Invite expired")
+        if invite.target_user_id and invite.target_user_id != user_id:
+            raise HTTPException(status_code=403, detail="This invite is not for you")
         raise HTTPException(status_code=400, detail="Invite has reached max uses")
-    # Check if already a member
-    existing = db.query(models.OrganizationMember).filter_by(organization_id=invite.org_id, user_id=user_id).first()
-    if existing:
+    joined = await db.scalar(
+        insert(models.OrganizationMember)
+        .values(user_id=user_id, organization_id=claimed.org_id, roles=["member"])
+        .on_conflict_do_nothing(constraint="uq_user_org")
+        .returning(models.OrganizationMember.id)
+    )
+    if joined is None:
+        # Give the use back
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Already a member")
-    # Add as member
-    member = models.OrganizationMember(user_id=user_id, organization_id=invite.org_id, roles=["member"])
-    db.add(member)
-    invite.uses += 1
-    if invite.uses >= invite.max_uses:
-        db.delete(invite)
-    db.commit()
+    if claimed.uses >= claimed.max_uses:
+        await db.execute(delete(Invite).where(Invite.id == claimed.id))
+    # A targeted invite can only be accepted by its target, so this covers the invite's change too
+    await bump_versions(db, user_ids=[user_id], org_ids=[claimed.org_id])
+    await db.commit()
+    membership_cache.invalidate((user_id, claimed.org_id))
     return {"detail": "Joined organization"}
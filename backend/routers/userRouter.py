@@ -1,18 +1,25 @@
 import random
 import string
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
-import requests
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import literal, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import EmailStr
 
-from config import GITHUB_CLIENT_SECRET, VITE_GITHUB_CLIENT_ID, PASSWORD_RESET_BASE_URL
-from helpers import emails, auth
+from config import PASSWORD_RESET_BASE_URL, VERIFICATION_CODE_TTL, PASSWORD_RESET_TTL
+from helpers import auth, github, jobs
+from helpers.janitor import expiry_cutoff
+from helpers.cache import user_cache
+from helpers.etags import bump_versions, etag_headers, make_etag, member_organizations, not_modified, user_version
+from helpers.serializers import model_response
 
-def get_current_user_id(user=Depends(auth.get_current_user)):
+async def get_current_user_id(user=Depends(auth.get_current_user)):
     return user.id
 import models, schemas
-from database import get_db
+from database import get_async_db
 
 def generate_verification_code(length: int = 4) -> str:
     return ''.join(random.choices(string.digits, k=length))
@@ -23,8 +30,8 @@ def generate_password_reset_code() -> str:
 router = APIRouter(tags=["users"])
 
 @router.get("/check-email")
-def checkEmail(email: EmailStr, db: Session = Depends(get_db)) -> schemas.EmailCheckResult:
-    db_user = db.query(models.User).filter_by(email=email).first()
+async def checkEmail(email: EmailStr, db: AsyncSession = Depends(get_async_db)) -> schemas.EmailCheckResult:
+    db_user = await db.scalar(select(models.User).filter_by(email=email))
 
     exists = db_user is not None
     isSocialUser = exists and db_user.auth_provider != "local"
@@ -32,33 +39,43 @@ def checkEmail(email: EmailStr, db: Session = Depends(get_db)) -> schemas.EmailC
     return schemas.EmailCheckResult(exists=exists, isSocialUser=isSocialUser, verified=verified)
 
 
-@router.post("/signup")
-async def signup(user: schemas.UserCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    existing_email = db.query(models.User).filter_by(email=user.email).first()
-    if existing_email:
+async def check_signup_conflict(db: AsyncSession, user: schemas.UserCreate):
+    taken = (await db.scalars(
+        select(models.User.email).where(or_(models.User.email == user.email, models.User.username == user.username))
+    )).all()
+    if user.email in taken:
         raise HTTPException(status_code=400, detail="Email already registered")
-    existing_username = db.query(models.User).filter_by(username=user.username).first()
-    if existing_username:
+    if taken:
         raise HTTPException(status_code=400, detail="Username already taken")
-    db_user = models.User(
-        email=user.email,
-        full_name=user.full_name,
-        username=user.username,
-        password_hash=auth.hash_password(user.password),
+
+@router.post("/signup", response_model=schemas.UserResponse)
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Reject duplicates with an index lookup before paying for bcrypt, and end that read transaction
+    # so no pooled connection is held while the hash is computed
+    await check_signup_conflict(db, user)
+    await db.rollback()
+    password_hash = await auth.hash_password(user.password)
+    code = generate_verification_code()
+    # One statement inserts the user and its verification code. The unique constraints still decide a
+    # race with a concurrent signup: on conflict nothing is inserted and no row comes back.
+    new_user = (
+        insert(models.User)
+        .values(email=user.email, full_name=user.full_name, username=user.username, password_hash=password_hash)
+        .on_conflict_do_nothing()
+        .returning(*models.User.__table__.c)
+        .cte("new_user")
     )
-    db.add(db_user)
+    new_code = (
+        insert(models.VerificationCode)
+        .from_select(["email", "code"], select(new_user.c.email, literal(int(code))))
+        .returning(models.VerificationCode.id)
+        .cte("new_code")
+    )
+    db_user = (await db.execute(select(new_user).add_cte(new_code))).first()
+    if db_user is None:
+        await check_signup_conflict(db, user)
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-    existing_code_entry = db.query(models.VerificationCode).filter_by(email=user.email).first()
-    if existing_code_entry:
-        code = existing_code_entry.code
-    else:
-        code = generate_verification_code()
-        db_verification_code = models.VerificationCode(email=user.email, code=code)
-        db.add(db_verification_code)
-    
-    db.commit()
-    db.refresh(db_user)
-    
     email_info = schemas.EmailDetails(
         recipients=[user.email],
         body={
@@ -66,171 +83,116 @@ async def signup(user: schemas.UserCreate, background_tasks: BackgroundTasks, db
             "verification_code": code,
         }
     )
-    background_tasks.add_task(emails.send_signup_verification_email, email_info)
+    # The email job commits with the user, so a signup can't be saved without its code being sent
+    jobs.enqueue_email(db, "signup_verification_email", email_info)
+    await db.commit()
 
-    return {"user": schemas.UserOut.model_validate(db_user)}
+    return model_response(schemas.UserResponse, {"user": db_user})
 
-@router.post("/login")
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter_by(email=user.email).first()
-    if not db_user or not db_user.password_hash or not auth.verify_password(user.password, db_user.password_hash):
+@router.post("/login", response_model=schemas.AuthResponse)
+async def login(user: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(models.User).filter_by(email=user.email))
+    if not db_user or not db_user.password_hash:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await auth.verify_and_update_password(user.password, db_user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     elif not db_user.verified:
         raise HTTPException(status_code=401, detail="Email not verified")
+    if new_hash:
+        # Stored hash used an older bcrypt cost
+        db_user.password_hash = new_hash
+        await db.commit()
+        user_cache.invalidate(db_user.id)
     
     token = auth.create_token({"user_id": db_user.id})
-    return {"token": token, "user": schemas.UserOut.model_validate(db_user)}
+    return model_response(schemas.AuthResponse, {"token": token, "user": db_user})
+
+async def resolve_social_user(db: AsyncSession, provider: str, email: str, full_name: str, username: str, picture_url: str) -> models.User:
+    """
+    The user behind a Google/GitHub login. A repeat login is a single join lookup. A first login
+    links the account to the user with that email, creating the user if there is none, and commits once.
+    """
+    db_user = await db.scalar(
+        select(models.User)
+        .join(models.LinkedAccount, models.LinkedAccount.user_id == models.User.id)
+        .where(models.LinkedAccount.provider == provider, models.LinkedAccount.email == email)
+    )
+    if db_user:
+        return db_user
+    db_user = await db.scalar(
+        insert(models.User)
+        .values(email=email, full_name=full_name, username=username, auth_provider=provider, picture_url=picture_url)
+        .on_conflict_do_nothing()
+        .returning(models.User)
+    )
+    if db_user is None:
+        # If a user exists with this email, link it for backward compatibility
+        db_user = await db.scalar(select(models.User).filter_by(email=email))
+        if db_user is None:
+            raise HTTPException(status_code=400, detail="Username already taken")
+        # An existing user gains a linked account (a new one has no ETags out yet)
+        await bump_versions(db, user_ids=[db_user.id])
+    await db.execute(
+        insert(models.LinkedAccount)
+        .values(user_id=db_user.id, provider=provider, email=email, picture_url=picture_url)
+        .on_conflict_do_nothing(index_elements=["email"])
+    )
+    await db.commit()
+    return db_user
 
-@router.post("/auth/google")
-def google_auth(payload: schemas.GoogleAuthRequest, db: Session = Depends(get_db)):
-    user_data = auth.verify_google_token(payload.token)
+@router.post("/auth/google", response_model=schemas.AuthResponse)
+async def google_auth(payload: schemas.GoogleAuthRequest, db: AsyncSession = Depends(get_async_db)):
+    user_data = await run_in_threadpool(auth.verify_google_token, payload.token)
     if not user_data or "email" not in user_data:
         raise HTTPException(status_code=400, detail="Invalid Google token")
     google_email = user_data["email"]
-    # Check for linked account first
-    linked = db.query(models.LinkedAccount).filter_by(provider="google", email=google_email).first()
-    if linked:
-        db_user = db.query(models.User).filter_by(id=linked.user_id).first()
-        if not db_user:
-            raise HTTPException(status_code=404, detail="User not found for linked account")
-    else:
-        # If a user exists with this Google email, link it for backward compatibility
-        db_user = db.query(models.User).filter_by(email=google_email).first()
-        if db_user:
-            # Create LinkedAccount for this user
-            linked = models.LinkedAccount(
-                user_id=db_user.id,
-                provider="google",
-                email=google_email,
-                picture_url=user_data.get("picture", "")
-            )
-            db.add(linked)
-            db.commit()
-        else:
-            # No user with this email, create a new user and LinkedAccount
-            db_user = models.User(
-                email=google_email,
-                full_name=user_data.get("name", ""),
-                username=google_email.split("@")[0],
-                auth_provider="google",
-                picture_url=user_data.get("picture", "")
-            )
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
-            linked = models.LinkedAccount(
-                user_id=db_user.id,
-                provider="google",
-                email=google_email,
-                picture_url=user_data.get("picture", "")
-            )
-            db.add(linked)
-            db.commit()
+    db_user = await resolve_social_user(
+        db, "google", google_email,
+        full_name=user_data.get("name", ""),
+        username=google_email.split("@")[0],
+        picture_url=user_data.get("picture", ""),
+    )
     token = auth.create_token({"user_id": db_user.id})
-    return {"token": token, "user": schemas.UserOut.model_validate(db_user)}
+    return model_response(schemas.AuthResponse, {"token": token, "user": db_user})
 
-@router.post("/auth/github")
-def github_auth(payload: dict, db: Session = Depends(get_db)):
+@router.post("/auth/github", response_model=schemas.AuthResponse)
+async def github_auth(payload: dict, db: AsyncSession = Depends(get_async_db)):
     code = payload.get("code")
     if not code:
         raise HTTPException(status_code=400, detail="Missing code")
-    # Exchange code for access token
-    token_resp = requests.post(
-        "https://github.com/login/oauth/access_token",
-        headers={"Accept": "application/json"},
-        data={
-            "client_id": VITE_GITHUB_CLIENT_ID,
-            "client_secret": GITHUB_CLIENT_SECRET,
-            "code": code,
-        },
-    )
-    if token_resp.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to get GitHub token")
-    token_data = token_resp.json()
-    access_token = token_data.get("access_token")
-    if not access_token:
-        raise HTTPException(status_code=400, detail="No access token from GitHub")
-    # Get user info from GitHub
-    user_resp = requests.get(
-        "https://api.github.com/user",
-        headers={"Authorization": f"Bearer {access_token}"}
+    user_data, github_email = await github.fetch_profile(code)
+    db_user = await resolve_social_user(
+        db, "github", github_email,
+        full_name=user_data.get("name") or user_data.get("login"),
+        username=user_data.get("login"),
+        picture_url=user_data.get("avatar_url", ""),
     )
-    if user_resp.status_code != 200:
-        raise HTTPException(status_code=400, detail="Failed to get GitHub user info")
-    user_data = user_resp.json()
-    github_email = user_data.get("email")
-    if not github_email:
-        emails_resp = requests.get(
-            "https://api.github.com/user/emails",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        if emails_resp.status_code == 200:
-            emails = emails_resp.json()
-            primary = next((e for e in emails if e.get("primary")), None)
-            github_email = primary["email"] if primary else emails[0]["email"] if emails else None
-    if not github_email:
-        raise HTTPException(status_code=400, detail="GitHub email not found")
-    # Check for linked account first
-    linked = db.query(models.LinkedAccount).filter_by(provider="github", email=github_email).first()
-    if linked:
-        db_user = db.query(models.User).filter_by(id=linked.user_id).first()
-        if not db_user:
-            raise HTTPException(status_code=404, detail="User not found for linked account")
-    else:
-        # If a user exists with this GitHub email, link it for backward compatibility
-        db_user = db.query(models.User).filter_by(email=github_email).first()
-        if db_user:
-            linked = models.LinkedAccount(
-                user_id=db_user.id,
-                provider="github",
-                email=github_email,
-                picture_url=user_data.get("avatar_url", "")
-            )
-            db.add(linked)
-            db.commit()
-        else:
-            db_user = models.User(
-                email=github_email,
-                full_name=user_data.get("name") or user_data.get("login"),
-                username=user_data.get("login"),
-                auth_provider="github",
-                picture_url=user_data.get("avatar_url", "")
-            )
-            db.add(db_user)
-            db.commit()
-            db.refresh(db_user)
-            linked = models.LinkedAccount(
-                user_id=db_user.id,
-                provider="github",
-                email=github_email,
-                picture_url=user_data.get("avatar_url", "")
-            )
-            db.add(linked)
-            db.commit()
     token = auth.create_token({"user_id": db_user.id})
-    from schemas import UserOut
-    return {"token": token, "user": UserOut.model_validate(db_user)}
+    return model_response(schemas.AuthResponse, {"token": token, "user": db_user})
 
 @router.post("/change-password")
-def change_password(payload: schemas.ChangePasswordRequest, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
-    db_user = db.query(models.User).filter_by(id=user_id).first()
+async def change_password(payload: schemas.ChangePasswordRequest, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    # The authenticated user may come from the cache; check the password against the current row
+    db_user = await db.get(models.User, user_id, populate_existing=True)
     if not db_user or not db_user.password_hash:
         raise HTTPException(status_code=404, detail="User not found or password not set")
-    if not auth.verify_password(payload.old_password, db_user.password_hash):
+    if not await auth.verify_password(payload.old_password, db_user.password_hash):
         raise HTTPException(status_code=401, detail="Old password is incorrect")
-    db_user.password_hash = auth.hash_password(payload.new_password)
-    db.commit()
+    db_user.password_hash = await auth.hash_password(payload.new_password)
+    await db.commit()
+    user_cache.invalidate(user_id)
     return {"detail": "Password changed successfully"}
 
-@router.post("/update-info")
-def update_info(payload: schemas.UpdateInfoRequest, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
-    db_user = db.query(models.User).filter_by(id=user_id).first()
+@router.post("/update-info", response_model=schemas.UserUpdateResult)
+async def update_info(payload: schemas.UpdateInfoRequest, db: AsyncSession = Depends(get_async_db), user_id: int = Depends(get_current_user_id)):
+    db_user = await db.get(models.User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Check email uniqueness if email is being updated
     if payload.email and payload.email != db_user.email:
-        email_exists = db.query(models.User).filter_by(email=payload.email).first()
+        email_exists = await db.scalar(select(models.User).filter_by(email=payload.email))
         if email_exists:
             raise HTTPException(status_code=400, detail="Email already registered")
 
@@ -241,25 +203,30 @@ def update_info(payload: schemas.UpdateInfoRequest, db: Session = Depends(get_db
         value = getattr(payload, field)
         if value is not None:
             setattr(db_user, field, value)
-    db.commit()
-    db.refresh(db_user)
-    return {"detail": "User info updated successfully", "user": schemas.UserOut.model_validate(db_user)}
+    # Member lists show the profile (the bump runs before the user row is flushed, see bump_versions)
+    await bump_versions(db, org_ids=member_organizations(user_id))
+    await db.commit()
+    user_cache.invalidate(user_id)
+    await db.refresh(db_user)
+    return model_response(schemas.UserUpdateResult, {"detail": "User info updated successfully", "user": db_user})
 
 @router.post("/resend-verification-code")
-def resend_verification_code(payload: schemas.EmailContainer, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter_by(email=payload.email).first()
+async def resend_verification_code(payload: schemas.EmailContainer, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.User).filter_by(email=payload.email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if user.verified:
         raise HTTPException(status_code=400, detail="User already verified")
-    code_entry = db.query(models.VerificationCode).filter_by(email=payload.email).first()
-    if code_entry:
+    code_entry = await db.scalar(select(models.VerificationCode).filter_by(email=payload.email))
+    if code_entry and code_entry.created_at >= expiry_cutoff(VERIFICATION_CODE_TTL):
         code = code_entry.code
     else:
         code = generate_verification_code()
-        db_verification_code = models.VerificationCode(email=payload.email, code=code)
-        db.add(db_verification_code)
-        db.commit()
+        if code_entry:
+            code_entry.code, code_entry.created_at = int(code), datetime.now(timezone.utc)
+        else:
+            db_verification_code = models.VerificationCode(email=payload.email, code=int(code))
+            db.add(db_verification_code)
     email_info = schemas.EmailDetails(
         recipients=[payload.email],
         body={
@@ -267,39 +234,48 @@ def resend_verification_code(payload: schemas.EmailContainer, background_tasks:
             "verification_code": code,
         }
     )
-    background_tasks.add_task(emails.send_signup_verification_email, email_info)
+    jobs.enqueue_email(db, "signup_verification_email", email_info)
+    await db.commit()
     return {"detail": "Sending"}
 
 @router.post("/verify-email")
-def verify_email(payload: schemas.EmailVerificationRequest, db: Session = Depends(get_db)):
+async def verify_email(payload: schemas.EmailVerificationRequest, db: AsyncSession = Depends(get_async_db)):
     email = payload.email
-    code = payload.code
-    code_entry = db.query(models.VerificationCode).filter_by(email=email, code=code).first()
+    # The code column is an integer; asyncpg won't coerce the submitted string for us
+    code = int(payload.code) if payload.code.strip().isdigit() else None
+    code_entry = await db.scalar(
+        select(models.VerificationCode)
+        .filter_by(email=email, code=code)
+        .where(models.VerificationCode.created_at >= expiry_cutoff(VERIFICATION_CODE_TTL))
+    ) if code is not None else None
     if not code_entry:
         raise HTTPException(status_code=400, detail="Invalid verification code")
-    user = db.query(models.User).filter_by(email=email).first()
+    user = await db.scalar(select(models.User).filter_by(email=email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     user.verified = True
-    db.delete(code_entry)
-    db.commit()
+    await db.delete(code_entry)
+    await db.commit()
+    user_cache.invalidate(user.id)
     return {"detail": "Email verified successfully"}
 
 @router.post('/send-password-reset-email')
-def send_password_reset_email(payload: schemas.EmailContainer, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter_by(email=payload.email).first()
+async def send_password_reset_email(payload: schemas.EmailContainer, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.User).filter_by(email=payload.email))
     if not user:
         raise HTTPException(status_code=404, detail="Email doesn't exist")
     
-    existing_reset_entry = db.query(models.PasswordReset).filter_by(email=payload.email).first()
-    if existing_reset_entry:
+    existing_reset_entry = await db.scalar(select(models.PasswordReset).filter_by(email=payload.email))
+    if existing_reset_entry and existing_reset_entry.created_at >= expiry_cutoff(PASSWORD_RESET_TTL):
         code = existing_reset_entry.code
     else:
         code = generate_password_reset_code()
-        db_pw_reset = models.PasswordReset(email=payload.email, code=code)
-        db.add(db_pw_reset)
-        db.commit()
-    
+        if existing_reset_entry:
+            existing_reset_entry.code, existing_reset_entry.created_at = code, datetime.now(timezone.utc)
+        else:
+            db_pw_reset = models.PasswordReset(email=payload.email, code=code)
+            db.add(db_pw_reset)
+
     email_info = schemas.EmailDetails(
         recipients=[payload.email],
         body={
@@ -307,93 +283,73 @@ def send_password_reset_email(payload: schemas.EmailContainer, background_tasks:
             "reset_link": f"{PASSWORD_RESET_BASE_URL}?code={code}"
         }
     )
-    background_tasks.add_task(emails.send_password_reset_email, email_info)
+    jobs.enqueue_email(db, "password_reset_email", email_info)
+    await db.commit()
     return {"detail": "Sending"}
 
 @router.get('/verify-password-reset-code')
-def verify_password_reset_code(code: str, db: Session = Depends(get_db)):
-    db_pw_reset = db.query(models.PasswordReset).filter_by(code=code).first()
+async def verify_password_reset_code(code: str, db: AsyncSession = Depends(get_async_db)):
+    db_pw_reset = await db.scalar(
+        select(models.PasswordReset)
+        .filter_by(code=code)
+        .where(models.PasswordReset.created_at >= expiry_cutoff(PASSWORD_RESET_TTL))
+    )
     if db_pw_reset is None:
         raise HTTPException(status_code=404, detail="Code not found")
     return {"detail":"Code found!"}
 
 @router.post('/reset-password')
-def reset_password(code: str, new_password: str, db: Session = Depends(get_db)):
-    db_pw_reset = db.query(models.PasswordReset).filter_by(code=code).first()
+async def reset_password(code: str, new_password: str, db: AsyncSession = Depends(get_async_db)):
+    db_pw_reset = await db.scalar(
+        select(models.PasswordReset)
+        .filter_by(code=code)
+        .where(models.PasswordReset.created_at >= expiry_cutoff(PASSWORD_RESET_TTL))
+    )
     if db_pw_reset is None:
         raise HTTPException(status_code=404, detail="Code not found")
     
-    db_user = db.query(models.User).filter_by(email=db_pw_reset.email).first()
+    db_user = await db.scalar(select(models.User).filter_by(email=db_pw_reset.email))
     if db_user is None:
         raise HTTPException(status_code=404, detail="User account no longer exists")
     
-    db_user.password_hash = auth.hash_password(new_password)
+    db_user.password_hash = await auth.hash_password(new_password)
 
     db.add(db_user)
-    db.delete(db_pw_reset)
-    db.commit()
+    await db.delete(db_pw_reset)
+    await db.commit()
+    user_cache.invalidate(db_user.id)
     
     return {"detail":'Success'}
 @router.get("/linked-accounts", response_model=list[schemas.LinkedAccountOut])
-def list_linked_accounts(user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
-    accounts = db.query(models.LinkedAccount).filter_by(user_id=user_id).all()
-    return accounts
+async def list_linked_accounts(request: Request, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    etag = make_etag(request, user_id, await user_version(db, user_id))
+    if cached := not_modified(request, etag):
+        return cached
+    accounts = (await db.scalars(select(models.LinkedAccount).filter_by(user_id=user_id))).all()
+    return model_response(list[schemas.LinkedAccountOut], accounts, headers=etag_headers(etag))
 
 @router.post("/link-account")
-def link_account(payload: schemas.LinkAccountRequest, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+async def link_account(payload: schemas.LinkAccountRequest, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
     provider = payload.provider
     token = payload.token
     # Check if already linked
-    existing = db.query(models.LinkedAccount).filter_by(user_id=user_id, provider=provider).first()
+    existing = await db.scalar(select(models.LinkedAccount).filter_by(user_id=user_id, provider=provider))
     if existing:
         raise HTTPException(status_code=400, detail="Account already linked")
     # Verify token and get email
     if provider == "google":
-        user_data = auth.verify_google_token(token)
+        user_data = await run_in_threadpool(auth.verify_google_token, token)
         if not user_data or "email" not in user_data:
             raise HTTPException(status_code=400, detail="Invalid Google token")
         email = user_data["email"]
         picture_url = user_data.get("picture")
     elif provider == "github":
-        token_resp = requests.post(
-            "https://github.com/login/oauth/access_token",
-            headers={"Accept": "application/json"},
-            data={
-                "client_id": VITE_GITHUB_CLIENT_ID,
-                "client_secret": GITHUB_CLIENT_SECRET,
-                "code": token,
-            },
-        )
-        if token_resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to get GitHub token")
-        token_data = token_resp.json()
-        access_token = token_data.get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=400, detail="No access token from GitHub")
-        user_resp = requests.get(
-            "https://api.github.com/user",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        if user_resp.status_code != 200:
-            raise HTTPException(status_code=400, detail="Failed to get GitHub user info")
-        user_data = user_resp.json()
-        email = user_data.get("email")
-        if not email:
-            emails_resp = requests.get(
-                "https://api.github.com/user/emails",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            if emails_resp.status_code == 200:
-                emails = emails_resp.json()
-                primary = next((e for e in emails if e.get("primary")), None)
-                email = primary["email"] if primary else emails[0]["email"] if emails else None
+        user_data, email = await github.fetch_profile(token)
         picture_url = user_data.get("avatar_url")
-        if not email:
-            raise HTTPException(status_code=400, detail="GitHub email not found")
     else:
         raise HTTPException(status_code=400, detail="Unsupported provider")
     # Check if email is already linked to another user
-    email_exists = db.query(models.LinkedAccount).filter_by(email=email).first()
+    email_exists = await db.scalar(select(models.LinkedAccount).filter_by(email=email))
     if email_exists:
         raise HTTPException(status_code=400, detail="This social account is already linked to another user")
     # Link account
@@ -404,15 +360,17 @@ def link_account(payload: schemas.LinkAccountRequest, user_id: int = Depends(get
         picture_url=picture_url
     )
     db.add(linked)
-    db.commit()
-    db.refresh(linked)
+    await bump_versions(db, user_ids=[user_id])
+    await db.commit()
+    await db.refresh(linked)
     return {"detail": f"{provider.capitalize()} account linked"}
 
 @router.post("/unlink-account")
-def unlink_account(payload: schemas.UnlinkAccountRequest, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
-    account = db.query(models.LinkedAccount).filter_by(user_id=user_id, provider=payload.provider, email=payload.email).first()
+async def unlink_account(payload: schemas.UnlinkAccountRequest, user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    account = await db.scalar(select(models.LinkedAccount).filter_by(user_id=user_id, provider=payload.provider, email=payload.email))
     if not account:
         raise HTTPException(status_code=404, detail="Linked account not found")
-    db.delete(account)
-    db.commit()
+    await db.delete(account)
+    await bump_versions(db, user_ids=[user_id])
+    await db.commit()
     return {"detail": f"{payload.provider.capitalize()} account unlinked"}
\ No newline at end of file
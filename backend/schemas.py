@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, ConfigDict, field_validator, field_serializer
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, field_validator, field_serializer
 from typing import List, Optional, Dict, Any
 from fastapi import BackgroundTasks
 
@@ -34,6 +34,23 @@ class UserOut(BaseModel):
     def serialize_date_of_birth(self, v: datetime | None) -> str | None:
         return v.strftime(r"%Y-%m-%d") if v else None
 
+class UserResponse(BaseModel):
+    user: UserOut
+
+class AuthResponse(UserResponse):
+    token: str
+
+class UserUpdateResult(UserResponse):
+    detail: str
+
+class UserSearchResult(BaseModel):
+    id: int
+    username: str
+    full_name: str
+    picture_url: str
+
+    model_config = ConfigDict(from_attributes=True)
+
 class EmailCheckResult(BaseModel):
     exists: bool
     isSocialUser: bool
@@ -86,6 +103,10 @@ class OrganizationOut(OrganizationBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class OrganizationPage(BaseModel):
+    items: List[OrganizationOut]
+    next_cursor: Optional[str] = None
+
 class OrganizationMemberBase(BaseModel):
     roles: List[str]
 
@@ -127,6 +148,15 @@ class OrganizationInviteOut(OrganizationInviteBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class OrganizationInviteBulkCreate(OrganizationInviteBase):
+    # usernames or emails, one invite each
+    targets: List[str] = Field(..., min_length=1, max_length=1000)
+
+class OrganizationInviteBulkResult(BaseModel):
+    target: str
+    status: str  # invited, not_found, already_member or duplicate
+    invite: Optional[OrganizationInviteOut] = None
+
 class OrganizationInviteAccept(BaseModel):
     code: str
 
@@ -0,0 +1,45 @@
+import uuid
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from database import Base, SessionLocal, async_engine, engine
+from main import app
+
+class AppTestCase:
+    """
+    A TestClient entered for the whole class, so its tests (and whatever they run through
+    client.portal) share one event loop and the asyncpg connections pooled on it, plus a session
+    for setting up data. Subclasses extend setup_class/teardown_class and call super().
+    """
+    session: Session
+    client: TestClient
+    tag: str
+
+    @classmethod
+    def setup_class(cls):
+        Base.metadata.create_all(engine)
+        cls.session = SessionLocal()
+        cls.client = TestClient(app)
+        # keep one event loop (and its asyncpg connections) for the whole class
+        cls.client.__enter__()
+        # unique prefix so repeated runs against the same database don't collide
+        cls.tag = uuid.uuid4().hex[:8]
+
+    @classmethod
+    def teardown_class(cls):
+        cls.client.__exit__(None, None, None)
+        cls.session.rollback()
+        cls.session.close()
+
+@contextmanager
+def count_queries(bind=async_engine.sync_engine):
+    """Collect every SQL statement sent through `bind` while the block runs."""
+    statements: list[str] = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
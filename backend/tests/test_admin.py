@@ -0,0 +1,253 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import logging
+from sqlalchemy import text
+from database import Base, engine
+from helpers import auth
+from helpers.pagination import encode_cursor
+from tests.base import AppTestCase, count_queries
+import manage
+import models
+
+class TestAdmin(AppTestCase):
+    headers: dict
+    org_ids: list[int]
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        admin = models.User(email=f"admin_{cls.tag}@mail.ru", username=f"admin_{cls.tag}", full_name="Admin", is_admin=True, verified=True)
+        cls.session.add(admin)
+        for i in range(5):
+            user = models.User(email=f"paged{i}_{cls.tag}@mail.ru", username=f"paged{i}_{cls.tag}", full_name="Paged User")
+            cls.session.add(user)
+            cls.session.flush()
+            cls.session.add(models.LinkedAccount(user_id=user.id, provider="github", email=f"gh{i}_{cls.tag}@mail.ru"))
+        cls.session.flush()
+        # three organizations with 3, 1 and 0 members
+        cls.org_ids = []
+        users = cls.session.query(models.User).filter(models.User.email.like(f"paged%_{cls.tag}@mail.ru")).order_by(models.User.id).all()
+        for i, size in enumerate([3, 1, 0]):
+            org = models.Organization(name=f"org{i}_{cls.tag}", created_by_user_id=admin.id)
+            cls.session.add(org)
+            cls.session.flush()
+            cls.org_ids.append(org.id)
+            for user in users[:size]:
+                cls.session.add(models.OrganizationMember(user_id=user.id, organization_id=org.id, roles=["member"]))
+        cls.session.commit()
+        cls.headers = {"Authorization": f"Bearer {auth.create_token({'user_id': admin.id})}"}
+
+    def test_users_require_admin(self):
+        response = self.client.get("/admin/users")
+        assert response.status_code == 401
+
+    def test_create_indexes_builds_indexes_missing_from_existing_tables(self, caplog):
+        names = ["ix_users_created_at_id", "ix_users_search_trgm", "ix_organizations_name_trgm", "ix_organization_members_org_id", "ix_verification_codes_created_at"]
+        # the class session's open read transaction would block the DROPs
+        self.session.rollback()
+        with engine.begin() as connection:
+            for name in names:
+                connection.execute(text(f"DROP INDEX {name}"))
+            # the leftover of a failed concurrent build
+            connection.execute(text("CREATE INDEX ix_users_created_at_id ON users (id)"))
+            connection.execute(text("UPDATE pg_index SET indisvalid = false WHERE indexrelid = 'ix_users_created_at_id'::regclass"))
+
+        # startup only warns
+        with caplog.at_level(logging.WARNING, logger="models"):
+            Base.metadata.create_all(engine)
+        assert all(name in caplog.text for name in names)
+        with engine.connect() as connection:
+            assert connection.scalar(text("SELECT count(*) FROM pg_indexes WHERE indexname = ANY(:names)"), {"names": names}) == 1
+
+        assert sorted(manage.create_indexes(engine)) == sorted(names)
+        with engine.connect() as connection:
+            valid = set(connection.scalars(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = ANY(:names) AND i.indisvalid"
+            ), {"names": names}))
+        assert valid == set(names)
+        assert manage.create_indexes(engine) == []
+
+    def test_pool_stats(self):
+        before = self.client.get("/admin/stats/pool", headers=self.headers).json()
+        assert {"size", "checked_out", "checked_in", "overflow", "max_overflow", "timeout", "recycle", "pre_ping",
+                "checkouts", "timeouts", "connections_opened", "connections_closed", "connections_invalidated", "wait"} <= before.keys()
+        assert {"count", "total_ms", "avg_ms", "max_ms", "buckets"} <= before["wait"].keys()
+        assert self.client.get("/admin/users", headers=self.headers).status_code == 200
+        after = self.client.get("/admin/stats/pool", headers=self.headers).json()
+        assert after["checkouts"] > before["checkouts"]
+        assert after["wait"]["count"] > before["wait"]["count"]
+        assert sum(after["wait"]["buckets"].values()) == after["wait"]["count"]
+
+        user = self.session.query(models.User).filter_by(email=f"paged0_{self.tag}@mail.ru").one()
+        headers = {"Authorization": f"Bearer {auth.create_token({'user_id': user.id})}"}
+        assert self.client.get("/admin/stats/pool", headers=headers).status_code == 403
+        self.session.rollback()
+
+    def test_users_keyset_pagination(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, "email_prefix": "paged", "sort": "email", "order": "asc"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/admin/users", params=params, headers=self.headers)
+            assert response.status_code == 200
+            data = response.json()
+            seen += [u["email"] for u in data["items"] if u["email"].endswith(f"_{self.tag}@mail.ru")]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert seen == [f"paged{i}_{self.tag}@mail.ru" for i in range(5)]
+
+    def test_users_linked_accounts_batched(self):
+        response = self.client.get("/admin/users", params={"username_prefix": f"paged0_{self.tag}"}, headers=self.headers)
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert len(items) == 1
+        assert items[0]["linked_accounts"] == [{"provider": "github"}]
+
+    def test_users_cursor_must_match_sort(self):
+        response = self.client.get("/admin/users", params={"limit": 1, "sort": "email"}, headers=self.headers)
+        cursor = response.json()["next_cursor"]
+        response = self.client.get("/admin/users", params={"cursor": cursor, "sort": "created_at"}, headers=self.headers)
+        assert response.status_code == 400
+
+    def test_users_tampered_cursor(self):
+        # right shape and sort, wrong value types
+        for values in (("created_at:desc", "yesterday", 1), ("created_at:desc", 1, "1"), ("id:asc", True, 1), ("id:asc", 10**30, 1)):
+            sort, order = values[0].split(":")
+            response = self.client.get("/admin/users", params={"cursor": encode_cursor(*values), "sort": sort, "order": order}, headers=self.headers)
+            assert response.status_code == 400
+            assert response.json()["detail"] == "Invalid cursor"
+
+    def test_organizations_member_count_sort(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 1, "name": self.tag, "sort": "member_count", "order": "desc"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/admin/organizations", params=params, headers=self.headers)
+            assert response.status_code == 200
+            data = response.json()
+            seen += [(o["name"], o["member_count"]) for o in data["items"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert seen == [(f"org0_{self.tag}", 3), (f"org1_{self.tag}", 1), (f"org2_{self.tag}", 0)]
+
+    def test_organization_detail_members_paginated(self):
+        org_id = self.org_ids[0]
+        response = self.client.get(f"/admin/organizations/{org_id}", params={"limit": 2}, headers=self.headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["member_count"] == 3
+        assert len(data["members"]) == 2
+        assert data["members"][0]["user"]["username"].startswith("paged")
+        response = self.client.get(f"/admin/organizations/{org_id}", params={"limit": 2, "cursor": data["members_next_cursor"]}, headers=self.headers)
+        data = response.json()
+        assert len(data["members"]) == 1
+        assert data["members_next_cursor"] is None
+
+    def test_organization_detail_member_filters(self):
+        org_id = self.org_ids[0]
+        response = self.client.get(f"/admin/organizations/{org_id}", params={"username": f"paged1_{self.tag}"}, headers=self.headers)
+        assert [m["user"]["username"] for m in response.json()["members"]] == [f"paged1_{self.tag}"]
+        response = self.client.get(f"/admin/organizations/{org_id}", params={"role": "admin"}, headers=self.headers)
+        assert response.json()["members"] == []
+
+    def test_email_templates_etag(self):
+        response = self.client.get("/admin/email-templates", headers=self.headers)
+        assert response.status_code == 200
+        assert "org_invite.jinja2" in response.json()
+        etag = response.headers["etag"]
+        response = self.client.get("/admin/email-templates", headers={**self.headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        # a list of tags, or the weak form, still matches
+        response = self.client.get("/admin/email-templates", headers={**self.headers, "If-None-Match": f'"stale", W/{etag}'})
+        assert response.status_code == 304
+
+    def test_user_search_ranked_and_fuzzy(self):
+        target = models.User(email=f"zq_{self.tag}@mail.ru", username=f"zq_{self.tag}", full_name=f"Zephyrine Quarrington {self.tag}")
+        self.session.add(target)
+        self.session.commit()
+        # a typo still finds the user (the run's tag keeps rows from earlier runs out of first place)
+        response = self.client.get("/admin/users/search", params={"q": f"Quarington {self.tag}"}, headers=self.headers)
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert items[0]["id"] == target.id and 0 < items[0]["score"] < 1
+        # substring hits across username/email, best match first
+        items = self.client.get("/admin/users/search", params={"q": f"paged3_{self.tag}"}, headers=self.headers).json()["items"]
+        assert items[0]["username"] == f"paged3_{self.tag}"
+        assert items[0]["linked_accounts"] == [{"provider": "github"}]
+        assert self.client.get("/admin/users/search", params={"q": "z"}, headers=self.headers).status_code == 422
+
+
+class TestAdminBulk(AppTestCase):
+    headers: dict
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        admin = models.User(email=f"badmin_{cls.tag}@mail.ru", username=f"badmin_{cls.tag}", full_name="Admin", is_admin=True, verified=True)
+        cls.session.add(admin)
+        cls.session.flush()
+        cls.user_ids = []
+        for i in range(4):
+            user = models.User(email=f"bulk{i}_{cls.tag}@mail.ru", username=f"bulk{i}_{cls.tag}", full_name="Bulk User")
+            cls.session.add(user)
+            cls.session.flush()
+            cls.user_ids.append(user.id)
+        org = models.Organization(name=f"bulk_{cls.tag}", created_by_user_id=admin.id)
+        cls.session.add(org)
+        cls.session.flush()
+        cls.org_id = org.id
+        cls.session.add(models.OrganizationMember(user_id=cls.user_ids[0], organization_id=org.id, roles=["member"]))
+        cls.session.add(models.LinkedAccount(user_id=cls.user_ids[3], provider="github", email=f"bgh_{cls.tag}@mail.ru"))
+        cls.session.commit()
+        cls.admin_id = admin.id
+        cls.headers = {"Authorization": f"Bearer {auth.create_token({'user_id': admin.id})}"}
+
+    def statuses(self, response) -> list[str]:
+        assert response.status_code == 200
+        return [r["status"] for r in response.json()["results"]]
+
+    def test_bulk_members(self):
+        a, b, c, _ = self.user_ids
+        url = f"/admin/organizations/{self.org_id}/members"
+        members = [{"user_id": a}, {"user_id": b, "roles": ["admin"]}, {"user_id": c}, {"user_id": b}, {"user_id": 10**9}]
+        with count_queries() as statements:
+            response = self.client.post(f"{url}/bulk-add", json={"members": members}, headers=self.headers)
+        assert self.statuses(response) == ["already_member", "added", "added", "duplicate", "user_not_found"]
+        assert response.json()["summary"]["added"] == 2
+        # admin check, org check, user lookup, one insert, and the organization's and users' version bumps
+        assert len([s for s in statements if not s.startswith(("BEGIN", "COMMIT"))]) <= 6
+
+        response = self.client.post(f"{url}/bulk-roles", json={"user_ids": [a, b, 10**9], "roles": ["owner"]}, headers=self.headers)
+        assert self.statuses(response) == ["updated", "updated", "not_member"]
+        roles = {m.user_id: m.roles for m in self.session.query(models.OrganizationMember).filter_by(organization_id=self.org_id)}
+        assert roles == {a: ["owner"], b: ["owner"], c: []}
+
+        response = self.client.post(f"{url}/bulk-remove", json={"user_ids": [b, c, b]}, headers=self.headers)
+        assert self.statuses(response) == ["removed", "removed", "duplicate"]
+        assert self.session.query(models.OrganizationMember).filter_by(organization_id=self.org_id).count() == 1
+
+        response = self.client.post(f"/admin/organizations/{10**9}/members/bulk-add", json={"members": members}, headers=self.headers)
+        assert response.status_code == 404
+
+    def test_bulk_users(self):
+        d = self.user_ids[3]
+        response = self.client.post("/admin/users/bulk-update", json={"user_ids": [d, 10**9], "is_admin": True}, headers=self.headers)
+        assert self.statuses(response) == ["updated", "not_found"]
+        assert self.session.get(models.User, d).is_admin
+
+        response = self.client.post("/admin/users/bulk-delete", json={"user_ids": [d, self.admin_id, 10**9]}, headers=self.headers)
+        assert self.statuses(response) == ["deleted", "owns_organizations", "not_found"]
+        self.session.expire_all()
+        assert self.session.get(models.User, d) is None
+        assert self.session.query(models.LinkedAccount).filter_by(user_id=d).count() == 0
+
+    def test_bulk_limits(self):
+        response = self.client.post("/admin/users/bulk-update", json={"user_ids": [], "is_admin": True}, headers=self.headers)
+        assert response.status_code == 422
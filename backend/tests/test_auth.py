@@ -1,29 +1,15 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
-from database import Base, engine, SessionLocal
-from main import app
+import uuid
+from config import BCRYPT_ROUNDS
+from helpers import auth
+from helpers.passwords import build_context
+from tests.base import AppTestCase, count_queries
+import models
 
-class TestAuth:
-    session: Session
-    client: TestClient
+class TestAuth(AppTestCase):
 
-    @classmethod
-    def setup_class(cls):
-        # ensure tables exist and set up a session
-        Base.metadata.create_all(engine)
-        cls.session = SessionLocal()
-        cls.client = TestClient(app)
-        pass
-
-    @classmethod
-    def teardown_class(cls):
-        # rollback the session and close it
-        cls.session.rollback()
-        cls.session.close()
-    
     def test_failed_login(self):
         # try to log in with non-existent credentials
         response = self.client.post(
@@ -84,6 +70,27 @@ class TestAuth:
         )
         assert response.status_code == 400
 
+    def test_signup_is_one_insert_statement(self):
+        tag = uuid.uuid4().hex[:8]
+        email = f"roundtrip_{tag}@mail.ru"
+        payload = {"email": email, "full_name": "Round Trip", "username": f"roundtrip_{tag}", "password": "pswrd"}
+        with count_queries() as statements:
+            response = self.client.post("/signup", json=payload)
+        assert response.status_code == 200
+        assert response.json()["user"]["username"] == f"roundtrip_{tag}"
+        # the duplicate check, the user and its code in one statement, then the email job
+        assert len(statements) == 3
+        assert self.session.query(models.VerificationCode).filter_by(email=email).count() == 1
+
+        # duplicates are rejected by the pre-check, before any hashing or insert
+        with count_queries() as statements:
+            response = self.client.post("/signup", json={**payload, "email": f"roundtrip_other_{tag}@mail.ru"})
+        assert response.status_code == 400 and response.json()["detail"] == "Username already taken"
+        assert len(statements) == 1
+        response = self.client.post("/signup", json={**payload, "username": f"roundtrip_other_{tag}"})
+        assert response.status_code == 400 and response.json()["detail"] == "Email already registered"
+        assert self.session.query(models.User).filter_by(email=f"roundtrip_other_{tag}@mail.ru").count() == 0
+
     def test_signup_and_login_wrong_password(self):
         email = "wrongpass@mail.ru"
         password = "rightpass"
@@ -128,3 +135,50 @@ class TestAuth:
         )
         # Accept 200 if your backend is case-insensitive, else 401
         assert response.status_code == 401
+
+    def test_login_rehashes_outdated_bcrypt_cost(self):
+        email = f"rehash_{uuid.uuid4().hex[:8]}@mail.ru"
+        password = "rehashpass"
+        old_rounds = 4 if BCRYPT_ROUNDS != 4 else 5
+        user = models.User(
+            email=email,
+            full_name="Rehash User",
+            username=email,
+            verified=True,
+            password_hash=build_context(old_rounds).hash(password),
+        )
+        self.session.add(user)
+        self.session.commit()
+        response = self.client.post(
+            "/login",
+            json={
+                "email": email,
+                "password": password,
+            }
+        )
+        assert response.status_code == 200
+        self.session.refresh(user)
+        assert user.password_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+
+    def test_authenticated_user_cached_and_invalidated(self):
+        tag = uuid.uuid4().hex[:8]
+        email = f"cached_{tag}@mail.ru"
+        admin_email = f"cached_admin_{tag}@mail.ru"
+        user = models.User(email=email, full_name="Cached User", username=email, verified=True)
+        admin = models.User(email=admin_email, full_name="Cached Admin", username=admin_email, verified=True, is_admin=True)
+        self.session.add_all([user, admin])
+        self.session.commit()
+        headers = {"Authorization": f"Bearer {auth.create_token({'user_id': user.id})}"}
+        admin_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': admin.id})}"}
+
+        assert self.client.get("/admin/stats/counts", headers=headers).status_code == 403
+        # second request authenticates from the cache
+        with count_queries() as statements:
+            self.client.get("/linked-accounts", headers=headers)
+        # (the endpoint's ETag reads users.version, but the user row itself isn't loaded)
+        assert not any("FROM users" in s and "users.email" in s for s in statements)
+
+        # admin update is written through, so the new flag applies immediately
+        response = self.client.put(f"/admin/users/{user.id}", json={"is_admin": True}, headers=admin_headers)
+        assert response.status_code == 200
+        assert self.client.get("/admin/stats/counts", headers=headers).status_code == 200
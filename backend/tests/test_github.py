@@ -0,0 +1,93 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from helpers import auth, github
+from tests.base import AppTestCase
+import models
+
+DELAY = 0.3
+
+class StubGitHub(BaseHTTPRequestHandler):
+    """Answers the OAuth and API calls the way GitHub does, each after a fixed delay."""
+    protocol_version = "HTTP/1.1"
+    users: dict = {}
+    connections: set = set()
+
+    def reply(self, status: int, body):
+        time.sleep(DELAY)
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.connections.add(self.client_address)
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.reply(200, {"access_token": "token"})
+
+    def do_GET(self):
+        self.connections.add(self.client_address)
+        user = self.users["current"]
+        if self.path == "/user":
+            # the profile email is private, so it comes from /user/emails
+            self.reply(200, {"login": user["login"], "name": "Octo Cat", "email": None, "avatar_url": ""})
+        elif self.path == "/user/emails":
+            self.reply(200, [{"email": f"alt_{user['email']}", "primary": False}, {"email": user["email"], "primary": True}])
+        else:
+            self.reply(404, {})
+
+    def log_message(self, format, *args):
+        pass
+
+class TestGitHubAuth(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitHub)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{cls.server.server_port}"
+        cls.urls = github.OAUTH_URL, github.API_URL
+        github.OAUTH_URL, github.API_URL = url, url
+
+    @classmethod
+    def teardown_class(cls):
+        github.OAUTH_URL, github.API_URL = cls.urls
+        cls.server.shutdown()
+        super().teardown_class()
+
+    def test_github_signup_fetches_profile_concurrently(self):
+        login = f"octo_{uuid.uuid4().hex[:8]}"
+        StubGitHub.users["current"] = {"login": login, "email": f"{login}@mail.ru"}
+        start = time.perf_counter()
+        response = self.client.post("/auth/github", json={"code": "abc"})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200
+        assert response.json()["user"]["email"] == f"{login}@mail.ru"
+        # token exchange, then /user and /user/emails side by side
+        assert elapsed < 3 * DELAY
+
+        # a second login reuses the pooled connections
+        StubGitHub.connections.clear()
+        response = self.client.post("/auth/github", json={"code": "abc"})
+        assert response.status_code == 200
+        assert len(StubGitHub.connections) <= 2
+
+    def test_link_github_account(self):
+        user = models.User(email=f"{uuid.uuid4().hex[:8]}@mail.ru", full_name="Linker", username=uuid.uuid4().hex[:8], verified=True)
+        self.session.add(user)
+        self.session.commit()
+        login = f"octo_{uuid.uuid4().hex[:8]}"
+        StubGitHub.users["current"] = {"login": login, "email": f"{login}@mail.ru"}
+        headers = {"Authorization": f"Bearer {auth.create_token({'user_id': user.id})}"}
+        response = self.client.post("/link-account", json={"provider": "github", "token": "abc"}, headers=headers)
+        assert response.status_code == 200
+        accounts = self.client.get("/linked-accounts", headers=headers).json()
+        assert [a["email"] for a in accounts] == [f"{login}@mail.ru"]
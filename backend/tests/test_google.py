@@ -0,0 +1,105 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import time
+import uuid
+import pytest
+import rsa
+from google.auth import crypt, jwt as google_jwt
+from config import GOOGLE_CLIENT_ID
+from database import SessionLocal
+from helpers import auth
+from helpers.google_certs import CertCache
+from tests.base import AppTestCase, count_queries
+import models
+
+public_key, private_key = rsa.newkeys(1024)
+PUBLIC_PEM = public_key.save_pkcs1().decode()
+signer = crypt.RSASigner.from_string(private_key.save_pkcs1().decode(), key_id="test-kid")
+
+def make_token(email: str, audience: str = GOOGLE_CLIENT_ID, issuer: str = "https://accounts.google.com") -> str:
+    now = int(time.time())
+    payload = {"iss": issuer, "aud": audience, "email": email, "name": "Google User", "iat": now, "exp": now + 600}
+    return google_jwt.encode(signer, payload).decode()
+
+class OfflineSource:
+    """Serves the generated key instead of fetching Google's certs."""
+    def __init__(self, max_age: float = 3600):
+        self.max_age = max_age
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"test-kid": PUBLIC_PEM}, self.max_age
+
+class TestGoogleCerts:
+    def test_certs_fetched_once_and_verified_locally(self):
+        source = OfflineSource()
+        cache = CertCache(source)
+        for _ in range(5):
+            assert cache.verify(make_token("a@mail.ru"), GOOGLE_CLIENT_ID)["email"] == "a@mail.ru"
+        assert source.calls == 1
+
+    def test_rejects_wrong_audience_and_issuer(self):
+        cache = CertCache(OfflineSource())
+        with pytest.raises(ValueError):
+            cache.verify(make_token("a@mail.ru", audience="someone-else"), GOOGLE_CLIENT_ID)
+        with pytest.raises(ValueError):
+            cache.verify(make_token("a@mail.ru", issuer="evil.example.com"), GOOGLE_CLIENT_ID)
+
+    def test_refreshes_in_background_before_expiry(self):
+        source = OfflineSource(max_age=120)
+        cache = CertCache(source, refresh_before=300)
+        cache.get()
+        # inside the refresh window: served from the cache while a refresh runs in the background
+        assert cache.get() == {"test-kid": PUBLIC_PEM}
+        for _ in range(50):
+            if source.calls == 2:
+                break
+            time.sleep(0.01)
+        assert source.calls == 2
+
+class TestGoogleAuth(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        cls.source = auth.google_certs.source
+        auth.google_certs.source = OfflineSource()
+        auth.google_certs._certs = None
+
+    @classmethod
+    def teardown_class(cls):
+        auth.google_certs.source = cls.source
+        auth.google_certs._certs = None
+        super().teardown_class()
+
+    def test_google_login(self):
+        email = f"g_{uuid.uuid4().hex[:8]}@mail.ru"
+        response = self.client.post("/auth/google", json={"token": make_token(email)})
+        assert response.status_code == 200
+        assert response.json()["user"]["email"] == email
+        assert self.client.post("/auth/google", json={"token": "not-a-token"}).status_code == 400
+
+    def test_repeat_login_is_one_query(self):
+        email = f"g_{uuid.uuid4().hex[:8]}@mail.ru"
+        with count_queries() as first:
+            assert self.client.post("/auth/google", json={"token": make_token(email)}).status_code == 200
+        # the lookup, then user and link inserted in one transaction
+        assert len(first) == 3
+        with count_queries() as repeat:
+            response = self.client.post("/auth/google", json={"token": make_token(email)})
+        assert response.status_code == 200 and response.json()["user"]["email"] == email
+        assert len(repeat) == 1
+
+    def test_login_links_existing_user(self):
+        email = f"g_{uuid.uuid4().hex[:8]}@mail.ru"
+        with SessionLocal() as session:
+            user = models.User(email=email, username=email, full_name="Local User", verified=True)
+            session.add(user)
+            session.commit()
+            response = self.client.post("/auth/google", json={"token": make_token(email)})
+            assert response.status_code == 200
+            assert response.json()["user"]["auth_provider"] == "local"
+            linked = session.query(models.LinkedAccount).filter_by(email=email).one()
+            assert linked.user_id == user.id and linked.provider == "google"
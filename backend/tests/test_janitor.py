@@ -0,0 +1,68 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+from datetime import datetime, timedelta, timezone
+from config import VERIFICATION_CODE_TTL, WORKER_STATS_TTL
+from helpers import auth, janitor, worker_stats
+from tests.base import AppTestCase
+import models
+import worker
+
+class TestJanitor(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        old = datetime.now(timezone.utc) - timedelta(seconds=VERIFICATION_CODE_TTL + 60)
+        cls.emails = []
+        for i in range(5):
+            user = models.User(email=f"jan{i}_{cls.tag}@mail.ru", username=f"jan{i}_{cls.tag}", full_name="Janitor")
+            cls.session.add(user)
+            cls.emails.append(user.email)
+        cls.session.flush()
+        # codes 0-3 are expired, code 4 is fresh
+        for i, email in enumerate(cls.emails):
+            cls.session.add(models.VerificationCode(email=email, code=1234, **({"created_at": old} if i < 4 else {})))
+        cls.session.add(models.PasswordReset(email=cls.emails[0], code=f"reset-{cls.tag}", created_at=old))
+        org = models.Organization(name=f"Janitor {cls.tag}", created_by_user_id=user.id)
+        cls.session.add(org)
+        cls.session.flush()
+        cls.session.add_all([
+            models.OrganizationInvite(org_id=org.id, code=f"expired-{cls.tag}", expires_at=old),
+            models.OrganizationInvite(org_id=org.id, code=f"used-{cls.tag}", uses=1, max_uses=1),
+            models.OrganizationInvite(org_id=org.id, code=f"live-{cls.tag}", max_uses=2),
+            # a worker that stopped reporting long ago
+            models.WorkerStats(worker=f"gone-{cls.tag}:1", stats={}, updated_at=old - timedelta(seconds=WORKER_STATS_TTL)),
+        ])
+        admin = models.User(email=f"jan_admin_{cls.tag}@mail.ru", username=f"jan_admin_{cls.tag}", full_name="Admin", is_admin=True, verified=True)
+        cls.session.add(admin)
+        cls.session.commit()
+        cls.admin_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': admin.id})}"}
+        cls.user_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': user.id})}"}
+
+    def test_expired_code_is_rejected(self):
+        response = self.client.post("/verify-email", json={"email": self.emails[1], "code": "1234"})
+        assert response.status_code == 400
+
+    def test_sweep_deletes_only_expired_rows_in_batches(self):
+        reclaimed = self.client.portal.call(janitor.sweep, 2)
+        assert reclaimed["verification_codes"] >= 4
+        assert reclaimed["password_resets"] >= 1 and reclaimed["organization_invites"] >= 2
+        codes = self.session.query(models.VerificationCode.email).filter(models.VerificationCode.email.in_(self.emails)).all()
+        assert [email for (email,) in codes] == [self.emails[4]]
+        assert self.session.query(models.PasswordReset).filter_by(email=self.emails[0]).count() == 0
+        invites = self.session.query(models.OrganizationInvite.code).filter(models.OrganizationInvite.code.like(f"%-{self.tag}")).all()
+        assert [code for (code,) in invites] == [f"live-{self.tag}"]
+        assert janitor.stats.snapshot()["runs"] >= 1
+        assert self.session.query(models.WorkerStats).filter_by(worker=f"gone-{self.tag}:1").count() == 0
+
+    def test_sweep_stats_published_for_admins(self):
+        self.client.portal.call(janitor.sweep, 2)
+        self.client.portal.call(worker.publish_stats)
+        assert self.client.get("/admin/stats/janitor", headers=self.user_headers).status_code == 403
+        response = self.client.get("/admin/stats/janitor", headers=self.admin_headers)
+        assert response.status_code == 200
+        [mine] = [w for w in response.json()["workers"] if w["worker"] == worker_stats.WORKER_ID]
+        assert mine["runs"] >= 1 and mine["last_run_at"] is not None
+        assert "verification_codes" in mine["last_reclaimed"]
+        assert 0 <= mine["lag_seconds"] < 60
@@ -0,0 +1,81 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from helpers import jobs
+from tests.base import AppTestCase
+import models
+import worker
+
+class TestJobs(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        cls.calls: list[tuple[str, int]] = []
+
+        async def flaky(payload):
+            cls.calls.append((payload["tag"], payload["n"]))
+            await asyncio.sleep(0.05)
+            if payload.get("fail"):
+                raise RuntimeError("boom")
+            if payload.get("key_error"):
+                raise KeyError("missing field")
+
+        jobs.HANDLERS["test_flaky"] = flaky
+
+    @classmethod
+    def teardown_class(cls):
+        jobs.HANDLERS.pop("test_flaky")
+        super().teardown_class()
+
+    def run_worker(self, batches: int = 1, **kwargs):
+        async def run():
+            return await asyncio.gather(*(worker.run_batch(**kwargs) for _ in range(batches)))
+        return self.client.portal.call(run)
+
+    def test_signup_enqueues_email_job(self):
+        email = f"job_{uuid.uuid4().hex[:8]}@mail.ru"
+        response = self.client.post("/signup", json={"email": email, "full_name": "Job", "username": email, "password": "pswrd"})
+        assert response.status_code == 200
+        job = self.session.query(models.Job).filter(models.Job.payload["recipients"][0].astext == email).one()
+        assert job.kind == "signup_verification_email" and job.status == "pending"
+
+    def test_worker_runs_each_job_once_and_retries_failures(self):
+        tag = uuid.uuid4().hex[:8]
+        ok = [models.Job(kind="test_flaky", payload={"n": i, "tag": tag}) for i in range(10)]
+        failing = models.Job(kind="test_flaky", payload={"n": 99, "tag": tag, "fail": True}, max_attempts=2)
+        self.session.add_all(ok + [failing])
+        self.session.commit()
+
+        # two workers polling at once split the due jobs between them
+        self.calls.clear()
+        claimed = self.run_worker(batches=2, batch_size=20, concurrency=4)
+        assert sorted(n for t, n in self.calls if t == tag) == list(range(10)) + [99]
+        assert sum(claimed) >= 11
+        remaining = self.session.query(models.Job).filter(models.Job.payload["tag"].astext == tag).all()
+        assert [job.id for job in remaining] == [failing.id]
+        self.session.refresh(failing)
+        assert failing.attempts == 1 and failing.status == "pending" and failing.last_error
+        assert failing.run_at > datetime.now(timezone.utc)
+
+        # out of attempts: kept for inspection, never picked up again
+        failing.run_at = datetime.now(timezone.utc)
+        self.session.commit()
+        self.run_worker()
+        self.session.refresh(failing)
+        assert failing.attempts == 2 and failing.status == "failed"
+        self.calls.clear()
+        self.run_worker()
+        assert (tag, 99) not in self.calls
+
+    def test_key_error_in_handler_is_retried(self):
+        job = models.Job(kind="test_flaky", payload={"n": 7, "key_error": True, "tag": uuid.uuid4().hex[:8]})
+        self.session.add(job)
+        self.session.commit()
+        self.run_worker(batch_size=100)
+        self.session.refresh(job)
+        assert job.status == "pending" and job.attempts == 1
+        assert "KeyError" in job.last_error and "No handler" not in job.last_error
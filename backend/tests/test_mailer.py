@@ -0,0 +1,111 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import socket
+import pytest
+from fastapi_mail import ConnectionConfig
+from pydantic import SecretStr
+from helpers import auth, worker_stats
+from helpers.emails import build_message
+from helpers.mailer import SMTPPool
+from schemas import EmailDetails
+from tests.base import AppTestCase
+import models
+import worker
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+class TestSMTPPool:
+    @classmethod
+    def setup_class(cls):
+        cls.handler = Recorder()
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        cls.controller = aiosmtpd_controller.Controller(cls.handler, hostname="127.0.0.1", port=port)
+        cls.controller.start()
+        cls.config = ConnectionConfig(
+            MAIL_USERNAME="", MAIL_PASSWORD=SecretStr(""), MAIL_FROM="alora@example.com", MAIL_FROM_NAME="Alora",
+            MAIL_SERVER="127.0.0.1", MAIL_PORT=cls.controller.port,
+            MAIL_STARTTLS=False, MAIL_SSL_TLS=False, USE_CREDENTIALS=False, SUPPRESS_SEND=0,
+        )
+
+    @classmethod
+    def teardown_class(cls):
+        cls.controller.stop()
+
+    def test_batches_over_reused_connections(self):
+        pool = SMTPPool(self.config, size=2, batch_size=10)
+
+        async def run():
+            messages = [
+                await build_message("Invite", EmailDetails(recipients=[f"user{i}@mail.ru"], body={"user_name": f"user{i}", "org_name": "Org", "invite_code": "1-abc"}), "org_invite.jinja2")
+                for i in range(30)
+            ]
+            await asyncio.gather(*(pool.send(m) for m in messages))
+            # a later message goes out on an already open connection
+            await pool.send(messages[0])
+            await pool.close()
+
+        asyncio.run(run())
+        assert len(self.handler.messages) == 31
+        assert self.handler.connections == 2
+        stats = pool.snapshot()
+        assert stats["sent"] == 31 and stats["failed"] == 0
+        assert stats["connections_opened"] == 2
+        assert stats["batches"] < 31
+        assert b"1-abc" in self.handler.messages[0].content
+
+
+class TestMailStats(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        admin = models.User(email=f"mail_admin_{cls.tag}@mail.ru", username=f"mail_admin_{cls.tag}", full_name="Admin", is_admin=True, verified=True)
+        user = models.User(email=f"mail_user_{cls.tag}@mail.ru", username=f"mail_user_{cls.tag}", full_name="User", verified=True)
+        cls.session.add_all([admin, user])
+        cls.session.commit()
+        cls.admin_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': admin.id})}"}
+        cls.user_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': user.id})}"}
+
+    def mail_stats(self) -> dict:
+        response = self.client.get("/admin/stats/mail", headers=self.admin_headers)
+        assert response.status_code == 200
+        mine = [w for w in response.json()["workers"] if w["worker"] == worker_stats.WORKER_ID]
+        return mine[0] if mine else {}
+
+    def test_mail_stats_admin_only(self):
+        assert self.client.get("/admin/stats/mail").status_code == 401
+        assert self.client.get("/admin/stats/mail", headers=self.user_headers).status_code == 403
+
+    def test_mail_stats_come_from_the_worker(self):
+        before = self.mail_stats()
+        self.session.add(models.Job(kind="signup_verification_email", payload=EmailDetails(
+            recipients=[f"mail_job_{self.tag}@mail.ru"], body={"user_name": "Mail", "verification_code": 1234},
+        ).model_dump(mode="json")))
+        self.session.commit()
+        assert self.client.portal.call(worker.run_batch, 100) >= 1
+        after = self.mail_stats()
+        assert after.keys() >= {"worker", "updated_at", "sent", "failed", "suppressed", "queued", "batches",
+                                "connections_opened", "reconnects", "messages_per_second", "latency"}
+        # tests run with SUPPRESS_SEND, so the message is counted as suppressed rather than sent
+        moved = after["sent"] + after["suppressed"] - before.get("sent", 0) - before.get("suppressed", 0)
+        assert moved >= 1
+        if before:
+            assert after["updated_at"] > before["updated_at"]
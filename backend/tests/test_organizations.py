@@ -0,0 +1,290 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from helpers import auth
+from helpers.pagination import encode_cursor
+from tests.base import AppTestCase, count_queries
+import models
+
+class TestListOrganizations(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        user = models.User(email=f"lo_{cls.tag}@mail.ru", username=f"lo_{cls.tag}", full_name="Browser", verified=True)
+        cls.session.add(user)
+        cls.session.flush()
+        cls.orgs = []
+        for i in range(5):
+            org = models.Organization(name=f"Browse {cls.tag} {i}", created_by_user_id=user.id)
+            cls.session.add(org)
+            cls.session.flush()
+            cls.orgs.append(org.id)
+        # the user belongs to orgs 1 (as admin) and 3
+        for i, roles in ((1, ["admin"]), (3, ["member"])):
+            cls.session.add(models.OrganizationMember(user_id=user.id, organization_id=cls.orgs[i], roles=roles))
+        cls.candidates = []
+        for name in ("Candidate One", "Candidate Two"):
+            candidate = models.User(email=f"{name[-3:].lower()}_{cls.tag}@mail.ru", username=f"cand_{name[-3:].lower()}_{cls.tag}", full_name=name)
+            cls.session.add(candidate)
+            cls.session.flush()
+            cls.candidates.append(candidate.id)
+        cls.session.add(models.OrganizationMember(user_id=cls.candidates[1], organization_id=cls.orgs[1], roles=["member"]))
+        cls.session.add(models.Organization(name=f"Odd 100%_{cls.tag}", created_by_user_id=user.id))
+        cls.session.commit()
+        cls.headers = {"Authorization": f"Bearer {auth.create_token({'user_id': user.id})}"}
+
+    def list_all(self, **params) -> list[str]:
+        names, cursor = [], None
+        while True:
+            response = self.client.get("/organizations/", params={**params, **({"cursor": cursor} if cursor else {})}, headers=self.headers)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["items"]) <= params.get("limit", 50)
+            names += [o["name"] for o in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return names
+
+    def test_search_is_paginated_and_case_insensitive(self):
+        names = self.list_all(q=f"BROWSE {self.tag.upper()}", limit=2)
+        assert names == [f"Browse {self.tag} {i}" for i in range(5)]
+
+    def test_exclude_mine(self):
+        names = self.list_all(q=self.tag, include_mine=False, limit=2)
+        assert names == [f"Browse {self.tag} {i}" for i in (0, 2, 4)] + [f"Odd 100%_{self.tag}"]
+
+    def test_search_wildcards_are_literal(self):
+        assert self.list_all(q=f"100%_{self.tag}") == [f"Odd 100%_{self.tag}"]
+        assert self.list_all(q=f"%{self.tag}") == []
+
+    def test_my_organizations_with_roles(self):
+        response = self.client.get("/organizations/me", headers=self.headers)
+        assert response.status_code == 200
+        orgs = response.json()
+        assert [(o["id"], o["user_roles"]) for o in orgs] == [(self.orgs[1], ["admin"]), (self.orgs[3], ["member"])]
+        assert orgs[0]["name"] == f"Browse {self.tag} 1" and orgs[0]["created_at"]
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/organizations/", params={"cursor": "nope"}, headers=self.headers)
+        assert response.status_code == 400
+        for values in (("a", "1"), (1, 1), ("a", 1, 1), ("a", {"dt": 1})):
+            response = self.client.get("/organizations/", params={"cursor": encode_cursor(*values)}, headers=self.headers)
+            assert response.status_code == 400
+            assert response.json()["detail"] == "Invalid cursor"
+
+    def test_invite_candidates_skip_members(self):
+        response = self.client.get(f"/organizations/{self.orgs[1]}/invite-candidates", params={"q": f"cand {self.tag}"}, headers=self.headers)
+        assert response.status_code == 200
+        assert [u["id"] for u in response.json()] == [self.candidates[0]]
+        assert "email" not in response.json()[0]
+        # only org admins may search
+        response = self.client.get(f"/organizations/{self.orgs[3]}/invite-candidates", params={"q": "cand"}, headers=self.headers)
+        assert response.status_code == 403
+
+    def test_bulk_invites(self):
+        one = self.session.get(models.User, self.candidates[0])
+        two = self.session.get(models.User, self.candidates[1])
+        targets = [one.username, one.email, two.username, f"nobody_{self.tag}"]
+        response = self.client.post(f"/organizations/{self.orgs[1]}/invites/bulk", json={"targets": targets, "max_uses": 1}, headers=self.headers)
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status"] for r in results] == ["invited", "duplicate", "already_member", "not_found"]
+        invite = results[0]["invite"]
+        assert invite["target_user_id"] == one.id and invite["organization"]["id"] == self.orgs[1]
+        job = self.session.query(models.Job).filter(models.Job.payload["recipients"][0].astext == one.email).one()
+        assert job.kind == "org_invite_email" and job.payload["body"]["invite_code"] == invite["code"]
+        # only org admins may invite
+        response = self.client.post(f"/organizations/{self.orgs[3]}/invites/bulk", json={"targets": targets}, headers=self.headers)
+        assert response.status_code == 403
+
+
+class TestAcceptInvite(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        owner = models.User(email=f"ai_owner_{cls.tag}@mail.ru", username=f"ai_owner_{cls.tag}", full_name="Owner", verified=True)
+        cls.session.add(owner)
+        cls.session.flush()
+        org = models.Organization(name=f"Accept {cls.tag}", created_by_user_id=owner.id)
+        cls.session.add(org)
+        cls.session.flush()
+        cls.owner_id = owner.id
+        cls.session.add(models.OrganizationMember(user_id=owner.id, organization_id=org.id, roles=["admin"]))
+        cls.org_id = org.id
+        cls.headers = []
+        for i in range(8):
+            user = models.User(email=f"ai{i}_{cls.tag}@mail.ru", username=f"ai{i}_{cls.tag}", full_name="Joiner", verified=True)
+            cls.session.add(user)
+            cls.session.flush()
+            cls.headers.append({"Authorization": f"Bearer {auth.create_token({'user_id': user.id})}"})
+        cls.session.commit()
+
+    def add_invite(self, code: str, **kwargs) -> models.OrganizationInvite:
+        invite = models.OrganizationInvite(org_id=self.org_id, code=f"{code}-{self.tag}", **kwargs)
+        self.session.add(invite)
+        self.session.commit()
+        return invite
+
+    def accept(self, code: str, headers: dict):
+        return self.client.post("/organizations/invites/accept", json={"code": f"{code}-{self.tag}"}, headers=headers)
+
+    def test_concurrent_accepts_respect_max_uses(self):
+        self.add_invite("rush", max_uses=3)
+        joiners = self.headers[:-1]
+        with ThreadPoolExecutor(len(joiners)) as pool:
+            responses = list(pool.map(lambda h: self.accept("rush", h), joiners))
+        # the losers see "max uses" or, once the last use deleted it, "not found"
+        assert [r.status_code for r in responses].count(200) == 3
+        assert {r.status_code for r in responses} <= {200, 400, 404}
+        assert self.session.query(models.OrganizationMember).filter_by(organization_id=self.org_id, roles=["member"]).count() == 3
+        # used up invites are removed
+        assert self.session.query(models.OrganizationInvite).filter_by(code=f"rush-{self.tag}").count() == 0
+
+    def test_accept_errors(self):
+        invite = self.add_invite("multi", max_uses=5)
+        headers = self.headers[-1]
+        assert self.accept("multi", headers).status_code == 200
+        response = self.accept("multi", headers)
+        assert response.status_code == 400 and response.json()["detail"] == "Already a member"
+        # the failed accept didn't consume a use
+        self.session.refresh(invite)
+        assert invite.uses == 1
+        assert self.accept("missing", headers).status_code == 404
+        self.add_invite("old", expires_at=datetime.now(timezone.utc) - timedelta(days=1))
+        assert self.accept("old", self.headers[1]).json()["detail"] == "Invite expired"
+        self.add_invite("private", target_user_id=self.owner_id)
+        assert self.accept("private", self.headers[1]).status_code == 403
+
+    def test_create_invite_retries_taken_code(self, monkeypatch):
+        from routers import orgRouter
+        owner_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': self.owner_id})}"}
+        taken = self.add_invite("taken").code
+        codes = iter([taken, f"fresh-{self.tag}"])
+        monkeypatch.setattr(orgRouter, "generate_invite_code", lambda org_id: next(codes))
+        with count_queries() as statements:
+            response = self.client.post(f"/organizations/{self.org_id}/invites", json={"max_uses": 2}, headers=owner_headers)
+        assert response.status_code == 200
+        assert response.json()["code"] == f"fresh-{self.tag}" and response.json()["organization"]["id"] == self.org_id
+        assert len([s for s in statements if s.startswith("INSERT INTO organization_invites")]) == 2
+
+    def test_invite_codes_are_long(self):
+        from routers.orgRouter import generate_invite_code
+        codes = {generate_invite_code(1) for _ in range(1000)}
+        assert len(codes) == 1000 and all(len(code) == len("1-") + 12 for code in codes)
+
+
+class TestDashboardETags(AppTestCase):
+
+    @classmethod
+    def setup_class(cls):
+        super().setup_class()
+        cls.user = models.User(email=f"et_{cls.tag}@mail.ru", username=f"et_{cls.tag}", full_name="Poller", verified=True)
+        cls.other = models.User(email=f"et2_{cls.tag}@mail.ru", username=f"et2_{cls.tag}", full_name="Other", verified=True)
+        admin = models.User(email=f"et_admin_{cls.tag}@mail.ru", username=f"et_admin_{cls.tag}", full_name="Admin", verified=True, is_admin=True)
+        cls.session.add_all([cls.user, cls.other, admin])
+        cls.session.flush()
+        cls.org = models.Organization(name=f"ETag {cls.tag}", created_by_user_id=cls.user.id)
+        cls.session.add(cls.org)
+        cls.session.flush()
+        cls.session.add_all([
+            models.OrganizationMember(user_id=cls.user.id, organization_id=cls.org.id, roles=["admin"]),
+            models.OrganizationMember(user_id=cls.other.id, organization_id=cls.org.id, roles=["member"]),
+        ])
+        cls.session.commit()
+        cls.headers = {"Authorization": f"Bearer {auth.create_token({'user_id': cls.user.id})}"}
+        cls.other_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': cls.other.id})}"}
+        cls.admin_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': admin.id})}"}
+
+    def get(self, path: str, etag: str | None = None):
+        headers = {**self.headers, **({"If-None-Match": etag} if etag else {})}
+        with count_queries() as statements:
+            response = self.client.get(path, headers=headers)
+        return response, statements
+
+    def assert_revalidates(self, path: str) -> str:
+        response, _ = self.get(path)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        response, statements = self.get(path, etag)
+        assert response.status_code == 304 and response.content == b""
+        assert response.headers["etag"] == etag
+        return etag
+
+    def test_unchanged_polls_get_304_from_one_query(self):
+        for path in ("/organizations/me", "/organizations/me/invites", "/linked-accounts"):
+            etag = self.assert_revalidates(path)
+            _, statements = self.get(path, etag)
+            assert len(statements) == 1
+
+    def test_my_organizations_change_with_membership(self):
+        etag = self.assert_revalidates("/organizations/me")
+        response = self.client.post("/organizations/", json={"name": f"ETag new {self.tag}"}, headers=self.headers)
+        assert response.status_code == 200
+        response, _ = self.get("/organizations/me", etag)
+        assert response.status_code == 200 and response.headers["etag"] != etag
+        assert f"ETag new {self.tag}" in [o["name"] for o in response.json()]
+        # someone else joining changes the organization's page, not this user's list
+        etag = response.headers["etag"]
+        detail_etag = self.assert_revalidates(f"/organizations/{self.org.id}")
+        joiner = models.User(email=f"et3_{self.tag}@mail.ru", username=f"et3_{self.tag}", full_name="Joiner", verified=True)
+        self.session.add(joiner)
+        self.session.commit()
+        joiner_headers = {"Authorization": f"Bearer {auth.create_token({'user_id': joiner.id})}"}
+        assert self.client.post(f"/organizations/{self.org.id}/join", headers=joiner_headers).status_code == 200
+        assert self.get("/organizations/me", etag)[0].status_code == 304
+        assert self.get(f"/organizations/{self.org.id}", detail_etag)[0].status_code == 200
+
+    def test_invites_change_when_targeted(self):
+        etag = self.assert_revalidates("/organizations/me/invites")
+        response = self.client.post("/organizations/", json={"name": f"ETag inviter {self.tag}"}, headers=self.other_headers)
+        other_org_id = response.json()["id"]
+        response = self.client.post(f"/organizations/{other_org_id}/invites", json={"target_username": self.user.username}, headers=self.other_headers)
+        assert response.status_code == 200
+        code = response.json()["code"]
+        response, _ = self.get("/organizations/me/invites", etag)
+        assert response.status_code == 200 and [i["code"] for i in response.json()] == [code]
+        # renaming the organization changes the nested name, so the invitee's ETag moves too
+        etag = response.headers["etag"]
+        new_name = f"ETag renamed {self.tag}"
+        assert self.client.put(f"/admin/organizations/{other_org_id}", json={"name": new_name}, headers=self.admin_headers).status_code == 200
+        response, _ = self.get("/organizations/me/invites", etag)
+        assert response.status_code == 200 and response.json()[0]["organization"]["name"] == new_name
+
+    def test_linked_accounts_change_when_unlinked(self):
+        account = models.LinkedAccount(user_id=self.user.id, provider="github", email=f"et_gh_{self.tag}@mail.ru")
+        self.session.add(account)
+        self.session.commit()
+        etag = self.assert_revalidates("/linked-accounts")
+        response = self.client.post("/unlink-account", json={"provider": "github", "email": account.email}, headers=self.headers)
+        assert response.status_code == 200
+        response, _ = self.get("/linked-accounts", etag)
+        assert response.status_code == 200 and response.json() == []
+
+    def test_organization_detail_changes_with_member_profile(self):
+        path = f"/organizations/{self.org.id}"
+        etag = self.assert_revalidates(path)
+        response = self.client.post("/update-info", json={"full_name": "Renamed Member", "email": None, "phone_number": None, "language": None, "gender": None, "timezone": None, "date_of_birth": None}, headers=self.other_headers)
+        assert response.status_code == 200
+        response, _ = self.get(path, etag)
+        assert response.status_code == 200
+        assert "Renamed Member" in [m["user"]["full_name"] for m in response.json()["members"]]
+        assert response.json()["current_user_roles"] == ["admin"]
+        # password changes don't show up, so they don't invalidate
+        etag = response.headers["etag"]
+        self.other.password_hash = "x"
+        self.session.commit()
+        assert self.get(path, etag)[0].status_code == 304
+
+    def test_owner_change_moves_etags(self):
+        paths = ("/organizations/me", f"/organizations/{self.org.id}")
+        etags = [self.assert_revalidates(path) for path in paths]
+        response = self.client.put(f"/admin/organizations/{self.org.id}", json={"created_by_user_id": self.other.id}, headers=self.admin_headers)
+        assert response.status_code == 200
+        for path, etag in zip(paths, etags):
+            response, _ = self.get(path, etag)
+            assert response.status_code == 200 and response.headers["etag"] != etag
+        assert response.json()["created_by_user_id"] == self.other.id
@@ -0,0 +1,64 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+from helpers import auth
+from tests.base import AppTestCase, count_queries
+import models
+
+class TestQueryCounts(AppTestCase):
+    """Member and invite listings must cost the same number of queries whatever their size."""
+
+    def make_org(self, size: int):
+        """Create an organization with `size` members, each holding an invite to it."""
+        name = f"qc{size}_{self.tag}"
+        owner = models.User(email=f"{name}_owner@mail.ru", username=f"{name}_owner", full_name="Owner", verified=True)
+        self.session.add(owner)
+        self.session.flush()
+        org = models.Organization(name=name, created_by_user_id=owner.id)
+        self.session.add(org)
+        self.session.flush()
+        self.session.add(models.OrganizationMember(user_id=owner.id, organization_id=org.id, roles=["admin"]))
+        for i in range(size):
+            user = models.User(email=f"{name}_{i}@mail.ru", username=f"{name}_{i}", full_name="Member")
+            self.session.add(user)
+            self.session.flush()
+            self.session.add(models.OrganizationMember(user_id=user.id, organization_id=org.id, roles=["member"]))
+            self.session.add(models.OrganizationInvite(org_id=org.id, code=f"{name}-{i}", target_user_id=owner.id))
+        self.session.commit()
+        return org.id, {"Authorization": f"Bearer {auth.create_token({'user_id': owner.id})}"}
+
+    def query_count(self, path: str, headers: dict) -> int:
+        with count_queries() as statements:
+            response = self.client.get(path, headers=headers)
+        assert response.status_code == 200
+        return len(statements)
+
+    def test_constant_queries_per_endpoint(self):
+        small_org, small_headers = self.make_org(2)
+        large_org, large_headers = self.make_org(8)
+        for path in ["/organizations/{}", "/organizations/{}/members", "/organizations/{}/invites"]:
+            small = self.query_count(path.format(small_org), small_headers)
+            large = self.query_count(path.format(large_org), large_headers)
+            assert small == large, path
+        assert self.query_count("/organizations/me/invites", small_headers) == self.query_count("/organizations/me/invites", large_headers)
+
+    def test_membership_cached_and_invalidated(self):
+        org_id, owner_headers = self.make_org(1)
+        member = self.session.query(models.User).filter_by(username=f"qc1_{self.tag}_0").one()
+        headers = {"Authorization": f"Bearer {auth.create_token({'user_id': member.id})}"}
+
+        assert self.client.get(f"/organizations/{org_id}/members", headers=headers).status_code == 200
+        # second request checks membership from the cache
+        with count_queries() as statements:
+            self.client.get(f"/organizations/{org_id}/members", headers=headers)
+        assert len([s for s in statements if "FROM organization_members" in s]) == 1
+
+        # promotion applies immediately
+        assert self.client.get(f"/organizations/{org_id}/invites", headers=headers).status_code == 403
+        response = self.client.patch(f"/organizations/{org_id}/members/{member.id}", json={"roles": ["admin"]}, headers=owner_headers)
+        assert response.status_code == 200
+        assert self.client.get(f"/organizations/{org_id}/invites", headers=headers).status_code == 200
+
+        # so does removal
+        assert self.client.delete(f"/organizations/{org_id}/members/{member.id}", headers=owner_headers).status_code == 200
+        assert self.client.get(f"/organizations/{org_id}/members", headers=headers).status_code == 403
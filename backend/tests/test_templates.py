@@ -0,0 +1,32 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import os
+from helpers.templates import TemplateCache
+
+class TestTemplateCache:
+    def test_recompiles_only_changed_templates(self, tmp_path):
+        (tmp_path / "hello.jinja2").write_text("Hello {{ name }}")
+        (tmp_path / "bye.jinja2").write_text("Bye {{ name }}")
+        cache = TemplateCache(tmp_path, check_interval=0)
+        assert cache.render_sync("hello.jinja2", {"name": "Ann"}) == "Hello Ann"
+        etag = cache.etag
+        compiled = cache._templates["bye.jinja2"].template
+
+        path = tmp_path / "hello.jinja2"
+        path.write_text("Hi {{ name }}")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert cache.render_sync("hello.jinja2", {"name": "Ann"}) == "Hi Ann"
+        assert cache.etag != etag
+        # untouched templates keep their compiled form
+        assert cache._templates["bye.jinja2"].template is compiled
+
+    def test_rescans_at_most_every_check_interval(self, tmp_path):
+        (tmp_path / "hello.jinja2").write_text("Hello")
+        cache = TemplateCache(tmp_path, check_interval=3600)
+        cache.refresh()
+        (tmp_path / "new.jinja2").write_text("New")
+        assert "new.jinja2" not in cache.sources()[1]
+        cache.refresh(force=True)
+        assert "new.jinja2" in cache.sources()[1]
@@ -0,0 +1,138 @@
+"""
+Background job worker, run as its own process (python worker.py) next to the API.
+
+Each poll claims up to JOB_BATCH_SIZE due jobs in one short transaction: SELECT ... FOR UPDATE
+SKIP LOCKED picks them, so any number of workers can share the table without handing the same job
+out twice, and the claim pushes their run_at past the time the batch may take (a lease) and counts
+the attempt. The handlers then run outside any transaction, at most JOB_CONCURRENCY at a time, and
+each job is deleted or rescheduled with exponential backoff in its own short transaction as it
+finishes. A worker that dies mid-batch leaves its jobs to be picked up again once the lease ends.
+
+Every JANITOR_INTERVAL seconds the worker also purges expired codes, resets and invites (helpers/janitor.py).
+After each batch and each sweep it publishes its mail and janitor statistics to worker_stats
+(helpers/worker_stats.py) for the admin API.
+"""
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import logging
+import math
+import random
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, update
+from config import JOB_BATCH_SIZE, JOB_CONCURRENCY, JOB_POLL_INTERVAL, JOB_TIMEOUT, JOB_RETRY_BASE, JOB_RETRY_MAX, JANITOR_INTERVAL
+from database import AsyncSessionLocal, async_engine, engine
+from helpers.emails import mailer
+from helpers import janitor, worker_stats
+from helpers.jobs import HANDLERS
+from helpers.templates import email_templates
+import models
+
+logger = logging.getLogger("worker")
+
+def retry_delay(attempts: int) -> float:
+    delay = min(JOB_RETRY_BASE * 2 ** (attempts - 1), JOB_RETRY_MAX)
+    # jitter so jobs that failed together don't all retry together
+    return delay * random.uniform(0.8, 1.2)
+
+def lease_seconds(batch_size: int, concurrency: int) -> float:
+    # Long enough for every job of the batch to wait its turn and run to JOB_TIMEOUT, plus a margin
+    return JOB_TIMEOUT * (math.ceil(batch_size / concurrency) + 1)
+
+async def claim_batch(batch_size: int, concurrency: int) -> list[models.Job]:
+    now = datetime.now(timezone.utc)
+    due = (
+        select(models.Job.id)
+        .where(models.Job.status == "pending", models.Job.run_at <= now)
+        .order_by(models.Job.run_at, models.Job.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    async with AsyncSessionLocal() as db, db.begin():
+        return list((await db.scalars(
+            update(models.Job)
+            .where(models.Job.id.in_(due.scalar_subquery()))
+            .values(run_at=now + timedelta(seconds=lease_seconds(batch_size, concurrency)), attempts=models.Job.attempts + 1)
+            .returning(models.Job)
+        )).all())
+
+async def finish_job(job: models.Job, error: str | None):
+    async with AsyncSessionLocal() as db, db.begin():
+        if error is None:
+            await db.execute(delete(models.Job).where(models.Job.id == job.id))
+        elif job.attempts >= job.max_attempts:
+            await db.execute(update(models.Job).where(models.Job.id == job.id).values(status="failed", last_error=error[:1000]))
+        else:
+            await db.execute(update(models.Job).where(models.Job.id == job.id).values(
+                run_at=datetime.now(timezone.utc) + timedelta(seconds=retry_delay(job.attempts)),
+                last_error=error[:1000],
+            ))
+
+async def run_job(job: models.Job, semaphore: asyncio.Semaphore):
+    """Run one claimed job and record the outcome."""
+    handler = HANDLERS.get(job.kind)
+    error = None
+    if handler is None:
+        error = f"No handler for job kind {job.kind!r}"
+    else:
+        async with semaphore:
+            try:
+                await asyncio.wait_for(handler(job.payload), JOB_TIMEOUT)
+            except Exception as exc:
+                logger.warning("job %s (%s) failed: %r", job.id, job.kind, exc)
+                error = repr(exc)
+    await finish_job(job, error)
+
+async def publish_stats():
+    # The mailer's and janitor's counters live in this process; the API serves them from worker_stats
+    async with AsyncSessionLocal() as db, db.begin():
+        await worker_stats.publish(db, {"mail": mailer.snapshot(), "janitor": janitor.stats.snapshot()})
+
+async def run_batch(batch_size: int = JOB_BATCH_SIZE, concurrency: int = JOB_CONCURRENCY) -> int:
+    """Claim and run one batch of due jobs; returns how many were claimed."""
+    jobs = await claim_batch(batch_size, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    await asyncio.gather(*(run_job(job, semaphore) for job in jobs))
+    if jobs:
+        await publish_stats()
+    return len(jobs)
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await asyncio.to_thread(email_templates.refresh, True)
+    logger.info("worker started (batch=%s, concurrency=%s)", JOB_BATCH_SIZE, JOB_CONCURRENCY)
+    swept_at = float("-inf")
+    try:
+        while not stop.is_set():
+            if time.monotonic() - swept_at >= JANITOR_INTERVAL:
+                swept_at = time.monotonic()
+                try:
+                    await janitor.sweep()
+                    await publish_stats()
+                except Exception:
+                    logger.exception("sweep failed")
+            try:
+                claimed = await run_batch()
+            except Exception:
+                logger.exception("batch failed")
+                claimed = 0
+            # a full batch means there is probably more waiting, so poll again right away
+            if claimed < JOB_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(stop.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await mailer.close()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    models.Base.metadata.create_all(bind=engine)
+    asyncio.run(main())
@@ -23,40 +23,96 @@ export interface AdminOrgMember {
   id: number;
   user_id: number;
   roles: string[];
-  user?: AdminUser;
+  user?: Pick<AdminUser, "id" | "username" | "email">;
 }
 
-export async function fetchAdminUsers() {
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+export interface AdminUserQuery {
+  cursor?: string | null;
+  limit?: number;
+  sort?: "created_at" | "email" | "username" | "id";
+  order?: "asc" | "desc";
+  email_prefix?: string;
+  username_prefix?: string;
+  is_admin?: boolean;
+  auth_provider?: string;
+  created_after?: string;
+  created_before?: string;
+}
+
+function toQueryString(params: object) {
+  const search = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== "") search.set(key, String(value));
+  });
+  const qs = search.toString();
+  return qs ? `?${qs}` : "";
+}
+
+export async function fetchAdminUsers(params: AdminUserQuery = {}): Promise<Page<AdminUser>> {
   const token = localStorage.getItem("token");
-  const res = await fetch(`${BASE_URL}/admin/users`, {
+  const res = await fetch(`${BASE_URL}/admin/users${toQueryString(params)}`, {
     headers: { "Authorization": `Bearer ${token}` }
   });
   if (!res.ok) throw new Error("Failed to fetch users");
   const data = await res.json();
-  return Array.isArray(data) ? data : [];
+  return { items: Array.isArray(data?.items) ? data.items : [], next_cursor: data?.next_cursor ?? null };
+}
+
+export interface AdminUserSearchResult extends AdminUser {
+  full_name: string;
+  score: number;
+}
+
+export async function searchAdminUsers(q: string, limit = 20): Promise<AdminUserSearchResult[]> {
+  const token = localStorage.getItem("token");
+  const res = await fetch(`${BASE_URL}/admin/users/search${toQueryString({ q, limit })}`, {
+    headers: { "Authorization": `Bearer ${token}` }
+  });
+  if (!res.ok) throw new Error("Failed to search users");
+  const data = await res.json();
+  return Array.isArray(data?.items) ? data.items : [];
+}
+
+export async function fetchAdminCounts(): Promise<{ users: number, organizations: number }> {
+  const token = localStorage.getItem("token");
+  const res = await fetch(`${BASE_URL}/admin/stats/counts`, {
+    headers: { "Authorization": `Bearer ${token}` }
+  });
+  if (!res.ok) throw new Error("Failed to fetch counts");
+  return res.json();
 }
 
-export async function fetchAdminOrgs() {
+export interface AdminOrgQuery {
+  cursor?: string | null;
+  limit?: number;
+  sort?: "created_at" | "member_count" | "name";
+  order?: "asc" | "desc";
+  name?: string;
+}
+
+export async function fetchAdminOrgs(params: AdminOrgQuery = {}): Promise<Page<AdminOrg>> {
   const token = localStorage.getItem("token");
-  const res = await fetch(`${BASE_URL}/admin/organizations`, {
+  const res = await fetch(`${BASE_URL}/admin/organizations${toQueryString(params)}`, {
     headers: { "Authorization": `Bearer ${token}` }
   });
   if (!res.ok) throw new Error("Failed to fetch organizations");
   const data = await res.json();
-  return Array.isArray(data) ? data : [];
+  return { items: Array.isArray(data?.items) ? data.items : [], next_cursor: data?.next_cursor ?? null };
 }
 
-export async function fetchAdminOrgMembers(orgId: number) {
+export async function fetchAdminOrgMembers(orgId: number, params: { cursor?: string | null, limit?: number, role?: string, username?: string } = {}): Promise<Page<AdminOrgMember>> {
   const token = localStorage.getItem("token");
-  const res = await fetch(`${BASE_URL}/admin/organizations/${orgId}`, {
+  const res = await fetch(`${BASE_URL}/admin/organizations/${orgId}${toQueryString(params)}`, {
     headers: { "Authorization": `Bearer ${token}` }
   });
   if (!res.ok) throw new Error("Failed to fetch organization");
   const data = await res.json();
-  if (data && typeof data === "object" && Array.isArray(data.members)) {
-    return data.members;
-  }
-  return [];
+  return { items: Array.isArray(data?.members) ? data.members : [], next_cursor: data?.members_next_cursor ?? null };
 }
 
 export async function deleteAdminOrg(orgId: number) {
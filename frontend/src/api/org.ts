@@ -96,8 +96,11 @@ export async function removeMember(orgId: number, userId: number) {
   return data;
 }
 
-export async function getJoinableOrganizations() {
-  const res = await fetch(`${BASE_URL}/organizations/?include_mine=false`, {
+export async function getJoinableOrganizations(q = "", cursor?: string | null) {
+  const params = new URLSearchParams({ include_mine: "false", limit: "50" });
+  if (q.trim()) params.set("q", q.trim());
+  if (cursor) params.set("cursor", cursor);
+  const res = await fetch(`${BASE_URL}/organizations/?${params.toString()}`, {
     headers: { Authorization: `Bearer ${authStore.token}` }
   });
   const data = await res.json();
@@ -146,6 +149,34 @@ export async function createOrgInvite(orgId: number, dataInput: { target_usernam
   return data;
 }
 
+export async function createOrgInvitesBulk(orgId: number, dataInput: { targets: string[]; max_uses?: number; expires_at?: string | null }) {
+  const res = await fetch(`${BASE_URL}/organizations/${orgId}/invites/bulk`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${authStore.token}`,
+    },
+    body: JSON.stringify(dataInput),
+  });
+  const data = await res.json();
+  if (!res.ok) {
+    throw new Error(data.detail || "Failed to create invites");
+  }
+  return data;
+}
+
+export async function searchInviteCandidates(orgId: number, q: string) {
+  const params = new URLSearchParams({ q, limit: "10" });
+  const res = await fetch(`${BASE_URL}/organizations/${orgId}/invite-candidates?${params.toString()}`, {
+    headers: { Authorization: `Bearer ${authStore.token}` },
+  });
+  const data = await res.json();
+  if (!res.ok) {
+    throw new Error(data.detail || "Failed to search users");
+  }
+  return data;
+}
+
 export async function revokeOrgInvite(orgId: number, inviteId: number) {
   const res = await fetch(`${BASE_URL}/organizations/${orgId}/invites/${inviteId}`, {
     method: "DELETE",
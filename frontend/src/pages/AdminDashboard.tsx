@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import AdminLayout from "./AdminLayout";
-import { fetchAdminUsers, fetchAdminOrgs, fetchTopOrgs } from "../api/admin";
+import { fetchAdminCounts, fetchTopOrgs } from "../api/admin";
 
 export default function AdminDashboard() {
   const [userCount, setUserCount] = useState<number | null>(null);
@@ -11,10 +11,10 @@ export default function AdminDashboard() {
 
   useEffect(() => {
     setLoading(true);
-    Promise.all([fetchAdminUsers(), fetchAdminOrgs()])
-      .then(([users, orgs]) => {
-        setUserCount(users.length);
-        setOrgCount(orgs.length);
+    fetchAdminCounts()
+      .then(counts => {
+        setUserCount(counts.users);
+        setOrgCount(counts.organizations);
       })
       .catch(e => setError(e.message))
       .finally(() => setLoading(false));
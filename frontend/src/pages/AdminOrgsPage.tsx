@@ -25,13 +25,27 @@ function MembersModal({ org, onClose }: { org: AdminOrg, onClose: () => void })
   const [members, setMembers] = useState<AdminOrgMember[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   useEffect(() => {
     setLoading(true);
     fetchAdminOrgMembers(org.id)
-      .then(setMembers)
+      .then(page => {
+        setMembers(page.items);
+        setNextCursor(page.next_cursor);
+      })
       .catch(e => setError(e.message))
       .finally(() => setLoading(false));
   }, [org.id]);
+
+  const loadMore = () => {
+    if (!nextCursor) return;
+    fetchAdminOrgMembers(org.id, { cursor: nextCursor })
+      .then(page => {
+        setMembers(prev => [...prev, ...page.items]);
+        setNextCursor(page.next_cursor);
+      })
+      .catch(e => setError(e.message));
+  };
   return (
     <div className="admin-modal-backdrop">
       <div className="admin-modal">
@@ -63,6 +77,9 @@ function MembersModal({ org, onClose }: { org: AdminOrg, onClose: () => void })
           </table>
         )}
         <div className="admin-modal-footer">
+          {nextCursor && (
+            <button className="admin-button" onClick={loadMore}>Load more</button>
+          )}
           <button className="admin-button admin-button-secondary" onClick={onClose}>Close</button>
         </div>
       </div>
@@ -77,18 +94,34 @@ export default function AdminOrgsPage() {
   const [editOrg, setEditOrg] = useState<AdminOrg | null>(null);
   const [confirm, setConfirm] = useState<AdminOrg | null>(null);
   const [membersOrg, setMembersOrg] = useState<AdminOrg | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [search, setSearch] = useState("");
+  const [sort, setSort] = useState<"created_at" | "member_count" | "name">("created_at");
 
   const reload = () => {
     setLoading(true);
-    fetchAdminOrgs()
-      .then(setOrgs)
+    fetchAdminOrgs({ name: search, sort })
+      .then(page => {
+        setOrgs(page.items);
+        setNextCursor(page.next_cursor);
+      })
       .catch(e => setError(e.message))
       .finally(() => setLoading(false));
   };
 
+  const loadMore = () => {
+    if (!nextCursor) return;
+    fetchAdminOrgs({ name: search, sort, cursor: nextCursor })
+      .then(page => {
+        setOrgs(prev => [...prev, ...page.items]);
+        setNextCursor(page.next_cursor);
+      })
+      .catch(e => setError(e.message));
+  };
+
   useEffect(() => {
     reload();
-  }, []);
+  }, [search, sort]);
 
   const handleEdit = (org: AdminOrg) => setEditOrg(org);
   const handleDelete = (org: AdminOrg) => setConfirm(org);
@@ -119,6 +152,14 @@ export default function AdminOrgsPage() {
   return (
     <AdminLayout>
       <h2>Organization Management</h2>
+      <div className="admin-form-group">
+        <input placeholder="Filter by name" value={search} onChange={e => setSearch(e.target.value)} />
+        <select value={sort} onChange={e => setSort(e.target.value as typeof sort)}>
+          <option value="created_at">Newest</option>
+          <option value="member_count">Most members</option>
+          <option value="name">Name</option>
+        </select>
+      </div>
       {loading ? (
         <div>Loading organizations...</div>
       ) : error ? (
@@ -151,6 +192,9 @@ export default function AdminOrgsPage() {
           </tbody>
         </table>
       )}
+      {!loading && !error && nextCursor && (
+        <button className="admin-button" onClick={loadMore}>Load more</button>
+      )}
 
       {editOrg && (
         <EditOrgModal org={editOrg} onSave={doEdit} onClose={() => setEditOrg(null)} />
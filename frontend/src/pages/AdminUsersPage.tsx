@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import AdminLayout from "./AdminLayout";
-import { fetchAdminUsers, type AdminUser, updateAdminUser, deleteAdminUser, sendPasswordResetEmail } from "../api/admin";
+import { fetchAdminUsers, searchAdminUsers, type AdminUser, type Page, updateAdminUser, deleteAdminUser, sendPasswordResetEmail } from "../api/admin";
 
 function EditUserModal({ user, onSave, onClose }: { user: AdminUser, onSave: (data: Partial<AdminUser>) => void, onClose: () => void }) {
   const [phone, setPhone] = useState(user.phone_number || "");
@@ -36,18 +36,37 @@ export default function AdminUsersPage() {
   const [error, setError] = useState<string | null>(null);
   const [editUser, setEditUser] = useState<AdminUser | null>(null);
   const [confirm, setConfirm] = useState<{ user: AdminUser, action: "delete" | "reset" } | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [search, setSearch] = useState("");
 
   const reload = () => {
     setLoading(true);
-    fetchAdminUsers()
-      .then(setUsers)
+    // Two or more characters switch from the paged list to ranked search results
+    const request: Promise<Page<AdminUser>> = search.trim().length >= 2
+      ? searchAdminUsers(search.trim()).then(items => ({ items, next_cursor: null }))
+      : fetchAdminUsers();
+    request
+      .then(page => {
+        setUsers(page.items);
+        setNextCursor(page.next_cursor);
+      })
       .catch(e => setError(e.message))
       .finally(() => setLoading(false));
   };
 
+  const loadMore = () => {
+    if (!nextCursor) return;
+    fetchAdminUsers({ cursor: nextCursor })
+      .then(page => {
+        setUsers(prev => [...prev, ...page.items]);
+        setNextCursor(page.next_cursor);
+      })
+      .catch(e => setError(e.message));
+  };
+
   useEffect(() => {
     reload();
-  }, []);
+  }, [search]);
 
   const handleEdit = (user: AdminUser) => setEditUser(user);
   const handleDelete = (user: AdminUser) => setConfirm({ user, action: "delete" });
@@ -83,6 +102,9 @@ export default function AdminUsersPage() {
   return (
     <AdminLayout>
       <h2>User Management</h2>
+      <div className="admin-form-group">
+        <input placeholder="Search by name, username or email" value={search} onChange={e => setSearch(e.target.value)} />
+      </div>
       {loading ? (
         <div>Loading users...</div>
       ) : error ? (
@@ -123,6 +145,9 @@ export default function AdminUsersPage() {
           </tbody>
         </table>
       )}
+      {!loading && !error && nextCursor && (
+        <button className="admin-button" onClick={loadMore}>Load more</button>
+      )}
 
       {editUser && (
         <EditUserModal user={editUser} onSave={doEdit} onClose={() => setEditUser(null)} />
@@ -15,7 +15,7 @@ import {
 } from "../api/org";
 import { updateMemberRoles } from "../api/org";
 import { listUserInvites, acceptInvite } from "../api/org";
-import { listOrgInvites, revokeOrgInvite } from "../api/org";
+import { listOrgInvites, revokeOrgInvite, searchInviteCandidates } from "../api/org";
 import { GoogleLogin } from "@react-oauth/google";
 
 const TABS = [
@@ -358,6 +358,8 @@ function OrgsTab() {
   const [showJoinDropdown, setShowJoinDropdown] = useState(false);
   const [newOrgName, setNewOrgName] = useState("");
   const [joinableOrgs, setJoinableOrgs] = useState<any[]>([]);
+  const [joinableCursor, setJoinableCursor] = useState<string | null>(null);
+  const [joinSearch, setJoinSearch] = useState("");
   const [selectedJoinOrgId, setSelectedJoinOrgId] = useState("");
   const [message, setMessage] = useState("");
   const [pendingLeave, setPendingLeave] = useState<Set<number>>(new Set());
@@ -376,12 +378,14 @@ function OrgsTab() {
     }
   };
 
-  const fetchJoinableOrgs = async () => {
+  const fetchJoinableOrgs = async (more = false) => {
     try {
-      const data = await getJoinableOrganizations();
-      setJoinableOrgs(data);
+      const data = await getJoinableOrganizations(joinSearch, more ? joinableCursor : null);
+      setJoinableOrgs(prev => (more ? [...prev, ...data.items] : data.items));
+      setJoinableCursor(data.next_cursor);
     } catch (e: any) {
-      setJoinableOrgs([]);
+      if (!more) setJoinableOrgs([]);
+      setJoinableCursor(null);
     }
   };
 
@@ -391,7 +395,7 @@ function OrgsTab() {
 
   useEffect(() => {
     if (showJoinDropdown) fetchJoinableOrgs();
-  }, [showJoinDropdown]);
+  }, [showJoinDropdown, joinSearch]);
 
   const handleCreate = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -510,6 +514,13 @@ function OrgsTab() {
       </div>
       {showJoinDropdown && (
         <div className="orgs-join-dropdown">
+          <input
+            type="text"
+            className="orgs-input"
+            placeholder="Search organizations..."
+            value={joinSearch}
+            onChange={e => setJoinSearch(e.target.value)}
+          />
           {joinableOrgs.length === 0 ? (
             <div className="orgs-empty-label">No organizations available to join.</div>
           ) : (
@@ -524,6 +535,9 @@ function OrgsTab() {
                 {joinableOrgs.map((org: any) => <option key={org.id} value={org.id}>{org.name}</option>)}
               </select>
               <button className="org-btn" type="submit" disabled={!selectedJoinOrgId}>Join</button>
+              {joinableCursor && (
+                <button className="org-btn" type="button" onClick={() => fetchJoinableOrgs(true)}>Load more</button>
+              )}
             </form>
           )}
         </div>
@@ -552,6 +566,7 @@ function UsersTab() {
   const [inviteError, setInviteError] = useState("");
   const [showNewInvite, setShowNewInvite] = useState(false);
   const [inviteTargetUser, setInviteTargetUser] = useState("");
+  const [inviteCandidates, setInviteCandidates] = useState<any[]>([]);
   const [inviteMaxUses, setInviteMaxUses] = useState(1);
   const [inviteExpiresAt, setInviteExpiresAt] = useState("");
   const [inviteCreateMsg, setInviteCreateMsg] = useState("");
@@ -624,6 +639,21 @@ function UsersTab() {
     }
   };
 
+  useEffect(() => {
+    const q = inviteTargetUser.trim();
+    if (!selectedOrg || !showNewInvite || q.length < 2) {
+      setInviteCandidates([]);
+      return;
+    }
+    // Small delay so typing doesn't fire a request per keystroke
+    const timer = setTimeout(() => {
+      searchInviteCandidates(selectedOrg.id, q)
+        .then(setInviteCandidates)
+        .catch(() => setInviteCandidates([]));
+    }, 200);
+    return () => clearTimeout(timer);
+  }, [inviteTargetUser, selectedOrg, showNewInvite]);
+
   const handleCreateInvite = async (e: React.FormEvent) => {
     e.preventDefault();
     setInviteCreateMsg("");
@@ -762,7 +792,10 @@ function UsersTab() {
                 <form onSubmit={handleCreateInvite} className="users-new-invite-form">
                   <label>
                     Target username (leave blank for open invite):
-                    <input type="text" value={inviteTargetUser} onChange={e => setInviteTargetUser(e.target.value)} placeholder="Target username (optional)" />
+                    <input type="text" list="invite-candidates" value={inviteTargetUser} onChange={e => setInviteTargetUser(e.target.value)} placeholder="Target username (optional)" />
+                    <datalist id="invite-candidates">
+                      {inviteCandidates.map((u: any) => <option key={u.id} value={u.username}>{u.full_name}</option>)}
+                    </datalist>
                   </label>
                   <label>
                     Max Uses: